@@ -5,6 +5,15 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Run with an ASGI server, e.g.
+``CACHE_BACKEND=file WEB_CONCURRENCY=4 uvicorn APARTMENT.asgi:application``.
+Several workers need a shared cache so a booking saved in one invalidates
+the availability, pages and search index held by the others.
+The availability check, booking and contact views are async; the rest run
+in Django's thread pool. Exports and media files are streamed with async
+iterators (``main.streaming``), so a large download is not buffered in
+memory first. ``manage.py bench_asgi`` compares this deployment with WSGI.
 """
 
 import os
@@ -12,6 +12,9 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
+
+from .database import database_config
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -32,6 +35,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'main.assets.StaticFilesMiddleware',  # WhiteNoise, async-capable
+    'main.metrics.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -44,7 +49,8 @@ ROOT_URLCONF = 'APARTMENT.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates plus render timing for main.metrics
+        'BACKEND': 'main.metrics.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'main' / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -53,6 +59,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'main.context_processors.cache_versions',
             ],
         },
     },
@@ -60,11 +67,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'APARTMENT.wsgi.application'
 
+# Database profile is chosen with DB_ENGINE (sqlite or mysql), see APARTMENT/database.py
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(BASE_DIR),
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -80,17 +85,70 @@ USE_I18N = True
 USE_TZ = True
 
 STATIC_URL = '/static/'
-STATICFILES_DIRS = [BASE_DIR / "main" / "static"]
+# main/static is collected by the app directories finder; this adds the project-level files
+STATICFILES_DIRS = [BASE_DIR / "static"]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
+# Serve uploads from Django (with ETag/Last-Modified, see main/media.py);
+# on by default only in DEBUG, set SERVE_MEDIA=1 when a CDN fronts the app.
+SERVE_MEDIA = os.environ.get('SERVE_MEDIA', '1' if DEBUG else '0') == '1'
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 60 * 60 * 24))
+
+# Outside DEBUG, collectstatic minifies STATIC_MINIFY, writes manifest-hashed
+# names and .gz/.br copies, and WhiteNoise serves the hashed files with
+# far-future immutable headers (see main/assets.py). DEBUG keeps plain
+# storage so templates render without running collectstatic first.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+        else 'main.assets.MinifiedStaticFilesStorage',
+    },
+}
+STATIC_MINIFY = ['main/css/styles.css', 'main/js/scripts.js']
 
-STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
-STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
-STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+# Widths (px) of the resized copies generated for uploaded images, see main/images.py
+IMAGE_DERIVATIVE_WIDTHS = [160, 480, 960, 1600]
+IMAGE_DERIVATIVE_QUALITY = 80
 
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache backend: local memory by default, CACHE_BACKEND=file to share one
+# on-disk cache between worker processes, or a dotted backend path.
+# The version tokens that invalidate availability schedules, cached pages,
+# site stats and the in-memory search index live in this cache, so every
+# worker must see the same one: WEB_CONCURRENCY (read by uvicorn and
+# gunicorn as their default worker count) above 1 needs a shared backend.
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKEND),
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'ubwiza_cache') if CACHE_BACKEND == 'file' else 'ubwiza',
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+if WEB_CONCURRENCY > 1 and CACHE_BACKEND == 'locmem':
+    raise ValueError(
+        "WEB_CONCURRENCY > 1 needs a cache shared by the workers; "
+        "set CACHE_BACKEND=file or a shared backend such as Redis or Memcached"
+    )
+# Seconds a version token lives. A process-local cache cannot see bumps made
+# by other processes (e.g. a worker started with --workers but no
+# WEB_CONCURRENCY), so its tokens expire quickly to bound the staleness.
+CACHE_VERSION_TIMEOUT = None if CACHE_BACKEND != 'locmem' else int(os.environ.get('CACHE_VERSION_TIMEOUT', 30))
+# Seconds a rendered public page or fragment may live; edits invalidate sooner.
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', 60 * 60))
+
 
 
 
@@ -117,6 +175,26 @@ CONTACT_EMAIL = 'tuyambazesylvain5@gmail.com'
 if DEBUG:
     EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Booking writes retry this many times (with doubling backoff, in seconds)
+# when the database reports lock contention, see main/bookings.py
+BOOKING_LOCK_RETRIES = 5
+BOOKING_LOCK_BACKOFF = 0.05
+
+# Per-view metrics (main/metrics.py): requests at least this slow are logged
+# with their SLOW_REQUEST_SQL_LIMIT most expensive queries
+SLOW_REQUEST_SECONDS = float(os.environ.get('SLOW_REQUEST_SECONDS', 1.0))
+SLOW_REQUEST_SQL_LIMIT = 10
+
+# Admin changelists of tables at least this large show the database's estimated
+# row count instead of running COUNT(*) (main/pagination.py); on SQLite the
+# estimate needs `manage.py analyze_database` to have run, e.g. from cron
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100000
+
+# Mail outbox: views queue messages, `manage.py send_queued_mail` delivers them
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_SECONDS = 60  # doubles after every failed attempt
+
 # Security settings for production
 if not DEBUG:
     SECURE_SSL_REDIRECT = True
@@ -178,6 +256,7 @@ JAZZMIN_SETTINGS = {
         "main.Booking": "fas fa-calendar-check",
         "main.ContactMessage": "fas fa-envelope",
         "main.Apartment": "fas fa-building",
+        "main.OutgoingEmail": "fas fa-paper-plane",
     },
     
     # Custom links to add to the side menu
@@ -198,6 +277,7 @@ JAZZMIN_SETTINGS = {
         "main.Gallery",
         "main.Booking", 
         "main.ContactMessage",
+        "main.OutgoingEmail",
         "auth",
     ],
     
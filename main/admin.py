@@ -1,16 +1,47 @@
-from django.contrib import admin
-from .models import Room, Gallery, Booking, ContactMessage, Apartment
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
+from .models import Room, Gallery, Booking, ContactMessage, Apartment, OutgoingEmail
+from . import bookings, exports, imports, search, validation
+from .forms import BookingAdminForm, BookingImportForm
+from .pagination import EstimatedCountPaginator
+from .stats import site_stats
+from .images import thumbnail_url
 from django.utils.html import format_html
 from django.urls import path
 from django.template.response import TemplateResponse
+from django.http import HttpResponse
+from django.shortcuts import redirect
+from django.utils import timezone
+from django.core.exceptions import PermissionDenied
 from django.db.models import Count, Sum
+from django.db.models.functions import Substr
 from datetime import datetime, timedelta
 
 admin.site.site_header = "Ubwiza Apartment Administration"
 admin.site.site_title = "Ubwiza Apartment Admin Portal"
 admin.site.index_title = "Welcome to Ubwiza Apartment Admin Dashboard"
 
-class RoomAdmin(admin.ModelAdmin):
+MESSAGE_LIST_LIMIT = 20
+MESSAGE_PREVIEW_LENGTH = 50
+
+def short_list(items):
+    """Comma-separated items for an admin message, cut off after MESSAGE_LIST_LIMIT."""
+    shown = ", ".join(str(item) for item in items[:MESSAGE_LIST_LIMIT])
+    if len(items) > MESSAGE_LIST_LIMIT:
+        shown += f" and {len(items) - MESSAGE_LIST_LIMIT} more"
+    return shown
+
+class FullTextSearchMixin:
+    """Admin search through the full-text index (main.search) instead of icontains.
+
+    ``search_fields`` only has to be non-empty for the search box to show;
+    the fields searched are those of the index's document for the model.
+    """
+    
+    def get_search_results(self, request, queryset, search_term):
+        return search.filter_queryset(queryset, search_term), False
+
+class RoomAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ['title', 'room_type', 'price', 'is_featured', 'image_preview']
     list_filter = ['room_type', 'is_featured', 'price']
     search_fields = ['title', 'description']
@@ -18,7 +49,7 @@ class RoomAdmin(admin.ModelAdmin):
     
     def image_preview(self, obj):
         if obj.image:
-            return format_html('<img src="{}" style="width: 50px; height: 50px; object-fit: cover;" />', obj.image.url)
+            return format_html('<img src="{}" style="width: 50px; height: 50px; object-fit: cover;" />', thumbnail_url(obj.image))
         return "No Image"
     image_preview.short_description = 'Image Preview'
 
@@ -29,7 +60,7 @@ class GalleryAdmin(admin.ModelAdmin):
     
     def image_preview(self, obj):
         if obj.image:
-            return format_html('<img src="{}" style="width: 50px; height: 50px; object-fit: cover;" />', obj.image.url)
+            return format_html('<img src="{}" style="width: 50px; height: 50px; object-fit: cover;" />', thumbnail_url(obj.image))
         return "No Image"
     image_preview.short_description = 'Image'
 
@@ -37,49 +68,174 @@ class BookingAdmin(admin.ModelAdmin):
     list_display = ['name', 'room', 'check_in', 'check_out', 'guests', 'confirmed', 'created_at']
     list_filter = ['confirmed', 'check_in', 'check_out', 'room', 'created_at']
     search_fields = ['name', 'email', 'phone']
+    ordering = ['-created_at']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = ['created_at']
     list_editable = ['confirmed']
-    actions = ['confirm_bookings', 'cancel_bookings']
+    actions = ['confirm_bookings', 'cancel_bookings', 'export_csv', 'export_jsonl']
+    form = BookingAdminForm
+    
+    def get_changelist_form(self, request, **kwargs):
+        # list_editable rows get the same overlap check as the change form
+        return super().get_changelist_form(request, form=BookingAdminForm, **kwargs)
+    
+    def get_queryset(self, request):
+        # list_display and __str__ both show the room
+        return super().get_queryset(request).with_room()
+    
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='main_booking_import'),
+        ] + super().get_urls()
+    
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        form = BookingImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            stream = imports.text_stream(form.cleaned_data['file'].file)
+            result = imports.import_bookings(imports.read_rows(stream, form.format))
+            self.message_user(request, f"{result.imported} bookings imported.")
+            if not result.rejected:
+                return redirect(f'{self.admin_site.name}:main_booking_changelist')
+            self.message_user(
+                request,
+                f"{len(result.rejected)} rows were rejected; their reasons are in the downloaded report.",
+                messages.WARNING,
+            )
+            response = HttpResponse(content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename="booking-import-rejects.csv"'
+            imports.write_rejects(result, response)
+            return response
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Import bookings',
+            'opts': self.model._meta,
+            'form': form,
+        }
+        return TemplateResponse(request, 'admin/main/booking/import.html', context)
+    
+    def save_model(self, request, obj, form, change):
+        # Confirmation goes through the booking service so it cannot double-book;
+        # BookingAdminForm has already refused overlaps it could see
+        if not obj.confirmed:
+            return super().save_model(request, obj, form, change)
+        try:
+            bookings.place_booking(obj)
+        except bookings.BookingConflict as exc:
+            overlapping = "#" + ", #".join(str(pk) for pk in exc.conflicting_ids)
+            if form.initial.get('confirmed'):
+                # Another stay was confirmed meanwhile; keep the guest's stay as stored
+                self.message_user(
+                    request,
+                    f"{obj} was not changed: the edit overlaps confirmed booking(s) {overlapping}",
+                    messages.ERROR,
+                )
+                return
+            obj.confirmed = False
+            super().save_model(request, obj, form, change)
+            self.message_user(
+                request,
+                f"{obj} was saved but not confirmed: it overlaps confirmed booking(s) {overlapping}",
+                messages.WARNING,
+            )
     
     def confirm_bookings(self, request, queryset):
-        queryset.update(confirmed=True)
-        self.message_user(request, f"{queryset.count()} bookings confirmed successfully.")
+        # Stays may already have begun by the time they are reviewed
+        pks, checks = validation.validate_queryset(queryset.filter(confirmed=False), allow_past=True)
+        invalid = [pks[index] for index in checks.invalid()]
+        confirmed, conflicts = bookings.confirm_bookings(queryset.exclude(pk__in=invalid))
+        self.message_user(request, f"{len(confirmed)} bookings confirmed successfully; the guests will be notified.")
+        if invalid:
+            self.message_user(
+                request,
+                f"{len(invalid)} bookings were not confirmed because their dates or guest count "
+                "break the booking rules: " + short_list([f"#{pk}" for pk in invalid]),
+                messages.WARNING,
+            )
+        if conflicts:
+            self.message_user(
+                request,
+                f"{len(conflicts)} bookings were not confirmed because they overlap confirmed stays: "
+                + short_list(conflicts),
+                messages.WARNING,
+            )
     confirm_bookings.short_description = "Confirm selected bookings"
     
     def cancel_bookings(self, request, queryset):
-        queryset.update(confirmed=False)
-        self.message_user(request, f"{queryset.count()} bookings cancelled.")
+        cancelled = bookings.cancel_bookings(queryset)
+        self.message_user(request, f"{cancelled} bookings cancelled.")
     cancel_bookings.short_description = "Cancel selected bookings"
+    
+    def export_csv(self, request, queryset):
+        return exports.export_response(request, 'bookings', 'csv', queryset)
+    export_csv.short_description = "Export selected bookings as CSV"
+    
+    def export_jsonl(self, request, queryset):
+        return exports.export_response(request, 'bookings', 'jsonl', queryset)
+    export_jsonl.short_description = "Export selected bookings as JSON Lines"
+
+class MessageChangeList(ChangeList):
+    """Changelist that loads only the start of each message on the page shown.
 
-class ContactMessageAdmin(admin.ModelAdmin):
+    Actions get their rows from get_queryset(), so exports still read the
+    whole message in one query.
+    """
+    
+    def get_results(self, request):
+        self.queryset = self.queryset.defer('message').annotate(
+            message_start=Substr('message', 1, MESSAGE_PREVIEW_LENGTH + 1),
+        )
+        super().get_results(request)
+
+class ContactMessageAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ['name', 'email', 'sent_at', 'message_preview']
     list_filter = ['sent_at']
     search_fields = ['name', 'email', 'message']
     readonly_fields = ['sent_at']
+    ordering = ['-sent_at']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ['export_csv', 'export_jsonl']
+    
+    def get_changelist(self, request, **kwargs):
+        return MessageChangeList
+    
+    def export_csv(self, request, queryset):
+        return exports.export_response(request, 'messages', 'csv', queryset)
+    export_csv.short_description = "Export selected messages as CSV"
+    
+    def export_jsonl(self, request, queryset):
+        return exports.export_response(request, 'messages', 'jsonl', queryset)
+    export_jsonl.short_description = "Export selected messages as JSON Lines"
     
     def message_preview(self, obj):
-        return obj.message[:50] + '...' if len(obj.message) > 50 else obj.message
+        start = getattr(obj, 'message_start', None)
+        if start is None:
+            start = obj.message[:MESSAGE_PREVIEW_LENGTH + 1]
+        return start[:MESSAGE_PREVIEW_LENGTH] + '...' if len(start) > MESSAGE_PREVIEW_LENGTH else start
     message_preview.short_description = 'Message Preview'
 
-class ApartmentAdmin(admin.ModelAdmin):
+class ApartmentAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ['name', 'photo_preview', 'has_video', 'youtube_preview']
     search_fields = ['name', 'description']
     fields = ['name', 'description', 'photo', 'video_url']
     
     def photo_preview(self, obj):
         if obj.photo:
-            return format_html('<img src="{}" style="width: 50px; height: 50px; object-fit: cover;" />', obj.photo.url)
+            return format_html('<img src="{}" style="width: 50px; height: 50px; object-fit: cover;" />', thumbnail_url(obj.photo))
         return "No Photo"
     photo_preview.short_description = 'Photo'
     
     def has_video(self, obj):
-        return obj.has_video()
+        return bool(obj.youtube_id)
     has_video.boolean = True
     has_video.short_description = 'Has Video'
+    has_video.admin_order_field = 'youtube_id'
     
     def youtube_preview(self, obj):
-        if obj.has_video():
-            youtube_id = obj.get_youtube_id()
+        if obj.youtube_id:
             return format_html(
                 '<a href="{}" target="_blank" style="color: #ff0000; font-weight: bold;">▶ YouTube</a>',
                 obj.video_url
@@ -87,6 +243,20 @@ class ApartmentAdmin(admin.ModelAdmin):
         return "No Video"
     youtube_preview.short_description = 'Video Link'
 
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'to', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['subject', 'to']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
+    actions = ['retry_now']
+    
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status=OutgoingEmail.SENT).update(
+            status=OutgoingEmail.PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"{updated} emails queued for retry.")
+    retry_now.short_description = "Retry selected emails now"
+
 # Custom Admin Site
 class CustomAdminSite(admin.AdminSite):
     site_header = "UBWIZA Apartment Administration"
@@ -102,16 +272,20 @@ class CustomAdminSite(admin.AdminSite):
     
     def dashboard_view(self, request):
         # Dashboard statistics
+        stats = site_stats()
         context = {
             **self.each_context(request),
-            'total_bookings': Booking.objects.count(),
-            'pending_bookings': Booking.objects.filter(confirmed=False).count(),
-            'confirmed_bookings': Booking.objects.filter(confirmed=True).count(),
-            'total_rooms': Room.objects.count(),
-            'featured_rooms': Room.objects.filter(is_featured=True).count(),
-            'total_messages': ContactMessage.objects.count(),
+            **stats,
+            'counters': [
+                ('Total bookings', stats['total_bookings']),
+                ('Pending', stats['pending_bookings']),
+                ('Confirmed', stats['confirmed_bookings']),
+                ('Rooms', stats['total_rooms']),
+                ('Featured rooms', stats['featured_rooms']),
+                ('Messages', stats['total_messages']),
+            ],
             'recent_messages': ContactMessage.objects.order_by('-sent_at')[:5],
-            'recent_bookings': Booking.objects.order_by('-created_at')[:5],
+            'recent_bookings': Booking.objects.with_room().order_by('-created_at')[:5],
         }
         return TemplateResponse(request, 'admin/dashboard.html', context)
 
@@ -123,10 +297,12 @@ admin_site.register(Gallery, GalleryAdmin)
 admin_site.register(Booking, BookingAdmin)
 admin_site.register(ContactMessage, ContactMessageAdmin)
 admin_site.register(Apartment, ApartmentAdmin)
+admin_site.register(OutgoingEmail, OutgoingEmailAdmin)
 
 # Also register with default admin for backup
 admin.site.register(Room, RoomAdmin)
 admin.site.register(Gallery, GalleryAdmin)
 admin.site.register(Booking, BookingAdmin)
 admin.site.register(ContactMessage, ContactMessageAdmin)
-admin.site.register(Apartment, ApartmentAdmin)
\ No newline at end of file
+admin.site.register(Apartment, ApartmentAdmin)
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""Per-room occupancy, stay length, lead time and revenue computed on NumPy columns.
+
+Bookings are loaded once with ``values_list`` into column arrays (dates as
+``datetime64[D]``); every metric is then a handful of array operations and
+``np.bincount`` group sums instead of a Python loop per booking.  Only the
+bookings a report needs are loaded: those overlapping its window and those
+still to come, which the projected revenue covers.
+"""
+import numpy as np
+from django.db.models import Q
+
+from .models import BILLING_PERIOD_NIGHTS, Booking, Room
+
+
+def booking_columns(queryset=None):
+    """Confirmed bookings as {'room', 'check_in', 'check_out', 'created'} arrays."""
+    if queryset is None:
+        queryset = Booking.objects.filter(confirmed=True)
+    rows = list(queryset.values_list('room_id', 'check_in', 'check_out', 'created_at').iterator(chunk_size=20000))
+    if not rows:
+        empty = np.array([], dtype='datetime64[D]')
+        return {'room': np.array([], dtype=np.int64), 'check_in': empty, 'check_out': empty, 'created': empty}
+    room, check_in, check_out, created = zip(*rows)
+    return {
+        'room': np.fromiter(room, dtype=np.int64, count=len(rows)),
+        'check_in': np.array(check_in, dtype='datetime64[D]'),
+        'check_out': np.array(check_out, dtype='datetime64[D]'),
+        # created_at is an aware UTC datetime; numpy wants naive values
+        'created': np.array([value.replace(tzinfo=None) for value in created], dtype='datetime64[D]'),
+    }
+
+
+def room_columns():
+    """(room ids, monthly prices) as sorted arrays."""
+    rows = list(Room.objects.order_by('id').values_list('id', 'price'))
+    ids = np.array([room_id for room_id, _ in rows], dtype=np.int64)
+    prices = np.array([float(price) for _, price in rows], dtype=np.float64)
+    return ids, prices
+
+
+def stay_costs(prices, nights):
+    """Vectorised Booking.estimated_cost(): price per whole month stayed, minimum one."""
+    return prices * np.maximum(1, nights // BILLING_PERIOD_NIGHTS)
+
+
+def relevant_bookings(start, end, today):
+    """Confirmed bookings overlapping [start, end) or checking in from ``today`` on."""
+    return Booking.objects.filter(
+        Q(check_in__lt=end, check_out__gt=start) | Q(check_in__gte=today),
+        confirmed=True,
+    )
+
+
+def room_metrics(columns, room_ids, prices, start, end, today):
+    """Per-room metrics for the window [start, end) plus revenue booked from ``today`` on.
+
+    Counts, stay lengths and lead times cover every booking in ``columns``,
+    normally relevant_bookings().  Returns a list of dicts, one per room in
+    ``room_ids`` order.
+    """
+    start, end, today = (np.datetime64(value, 'D') for value in (start, end, today))
+    window_nights = max(int((end - start).astype(np.int64)), 1)
+    size = len(room_ids)
+
+    # Map each booking's room id onto its position in room_ids
+    index = np.searchsorted(room_ids, columns['room'])
+    known = (index < size) & (room_ids[np.minimum(index, size - 1)] == columns['room']) if size else np.zeros(0, bool)
+    index = index[known]
+    check_in = columns['check_in'][known]
+    check_out = columns['check_out'][known]
+    created = columns['created'][known]
+
+    nights = (check_out - check_in).astype(np.int64)
+    in_window = np.clip(
+        (np.minimum(check_out, end) - np.maximum(check_in, start)).astype(np.int64), 0, None
+    )
+    lead_days = np.maximum((check_in - created).astype(np.int64), 0)
+    costs = stay_costs(prices[index], nights)
+    upcoming = check_in >= today
+
+    counts = np.bincount(index, minlength=size)
+    occupied = np.bincount(index, weights=in_window, minlength=size)
+    total_nights = np.bincount(index, weights=nights, minlength=size)
+    total_lead = np.bincount(index, weights=lead_days, minlength=size)
+    projected = np.bincount(index, weights=np.where(upcoming, costs, 0.0), minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_stay = np.where(counts > 0, total_nights / counts, 0.0)
+        avg_lead = np.where(counts > 0, total_lead / counts, 0.0)
+
+    return [
+        {
+            'room_id': int(room_ids[i]),
+            'confirmed_bookings': int(counts[i]),
+            'occupied_nights': int(occupied[i]),
+            'occupancy_rate': round(float(occupied[i]) / window_nights, 4),
+            'average_stay_nights': round(float(avg_stay[i]), 2),
+            'average_lead_time_days': round(float(avg_lead[i]), 2),
+            'projected_revenue': round(float(projected[i]), 2),
+        }
+        for i in range(size)
+    ]
+
+
+def summarize(start, end, today):
+    room_ids, prices = room_columns()
+    columns = booking_columns(relevant_bookings(start, end, today))
+    return room_metrics(columns, room_ids, prices, start, end, today)
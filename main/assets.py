@@ -0,0 +1,164 @@
+"""Static asset pipeline: minification ahead of hashing and compression.
+
+``MinifiedStaticFilesStorage`` minifies the files listed in
+``settings.STATIC_MINIFY`` while ``collectstatic`` runs, then hands over to
+WhiteNoise, which writes manifest-hashed copies plus ``.gz`` (and ``.br``
+when the brotli package is installed) files that it serves with far-future,
+immutable cache headers.
+"""
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.files.base import ContentFile
+from whitenoise.middleware import WhiteNoiseMiddleware
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+_STRING = r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\''
+_CSS_TOKENS = re.compile(rf'({_STRING})|/\*.*?\*/|(\s+)', re.S)
+# Space before a colon only matters in selectors (``a :hover``); a colon
+# followed by ``;`` or ``}`` before any ``{`` belongs to a declaration.
+_CSS_PUNCTUATION = re.compile(
+    rf'({_STRING})|(?:\s*;)*\s*(\}})\s*|\s*([{{;,>])\s*|\s*(:)\s*(?=[^{{}};]*[;}}])|(:)\s+'
+)
+
+
+def minify_css(text):
+    """Drop comments and redundant whitespace; strings are left untouched."""
+    def squeeze(match):
+        if match.group(1):
+            return match.group(1)
+        return ' ' if match.group(2) else ''
+
+    def tighten(match):
+        return next(group for group in match.groups() if group)
+
+    text = _CSS_TOKENS.sub(squeeze, text)
+    return _CSS_PUNCTUATION.sub(tighten, text).strip()
+
+
+# A '/' after one of these (or at the start) begins a regex literal, not a division
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORD = re.compile(r'(?:^|[^\w$])(?:return|typeof|case|do|else|in|of|new|delete|void|throw)$')
+
+
+def _skip_quoted(text, i, quote):
+    """Index just past the literal that opens with ``quote`` at ``i``."""
+    i += 1
+    while i < len(text) and text[i] != quote:
+        i += 2 if text[i] == '\\' else 1
+    return i + 1
+
+
+def _skip_regex(text, i):
+    i += 1
+    in_class = False
+    while i < len(text) and (in_class or text[i] != '/') and text[i] != '\n':
+        if text[i] == '\\':
+            i += 1
+        elif text[i] == '[':
+            in_class = True
+        elif text[i] == ']':
+            in_class = False
+        i += 1
+    i += 1
+    while i < len(text) and text[i].isalpha():
+        i += 1
+    return i
+
+
+def _starts_regex(output):
+    code = ''.join(output[-20:]).rstrip()
+    return not code or code[-1] in _REGEX_PRECEDERS or _REGEX_KEYWORD.search(code) is not None
+
+
+def minify_js(text):
+    """Conservative JavaScript minifier.
+
+    Removes comments, indentation and blank lines but keeps line breaks, so
+    automatic semicolon insertion behaves exactly as in the source.
+    """
+    output = []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char in '"\'`':
+            end = _skip_quoted(text, i, char)
+            output.append(text[i:end])
+            i = end
+        elif text.startswith('//', i):
+            end = text.find('\n', i)
+            i = len(text) if end == -1 else end
+        elif text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            end = len(text) if end == -1 else end + 2
+            output.append('\n' if '\n' in text[i:end] else ' ')
+            i = end
+        elif char == '/' and _starts_regex(output):
+            end = _skip_regex(text, i)
+            output.append(text[i:end])
+            i = end
+        else:
+            output.append(char)
+            i += 1
+
+    lines = (line.strip() for line in ''.join(output).splitlines())
+    return '\n'.join(re.sub(r'[ \t]+', ' ', line) for line in lines if line)
+
+
+def minify(name, text):
+    if name.endswith('.css'):
+        return minify_css(text)
+    if name.endswith('.js'):
+        return minify_js(text)
+    return text
+
+
+class MinifiedStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """WhiteNoise's hashed + compressed storage, minifying STATIC_MINIFY first."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = dict(paths)
+            for name in getattr(settings, 'STATIC_MINIFY', []):
+                if name not in paths:
+                    continue
+                source_storage, source_path = paths[name]
+                with source_storage.open(source_path) as source:
+                    text = source.read().decode('utf-8')
+                if self.exists(name):
+                    self.delete(name)
+                self.save(name, ContentFile(minify(name, text).encode('utf-8')))
+                # Hash and compress the minified copy rather than the source
+                paths[name] = (self, name)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise middleware that also runs natively in an async (ASGI) stack.
+
+    The stock middleware is sync-only, which would make Django run every
+    async view through a thread; here a static hit is a dict lookup in both
+    modes and other requests go straight on to the next handler.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
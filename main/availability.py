@@ -0,0 +1,152 @@
+"""In-process index of confirmed stays used to answer availability checks.
+
+Each room keeps its confirmed (check_in, check_out) intervals sorted by
+check-in together with a running maximum of check-out dates, so asking
+whether a date range overlaps any stay is a single bisect.  Schedules are
+rebuilt lazily, one query per room, whenever the room's version in the
+default cache changes (see ``main.signals`` and ``main.caching``).
+"""
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import timedelta
+from itertools import accumulate
+
+from .caching import bump_version, get_versions
+from .models import Booking, Room
+
+_schedules = {}
+_lock = threading.Lock()
+
+
+def _version_name(room_id):
+    return f'availability:room:{room_id}'
+
+
+class RoomSchedule:
+    """Confirmed stays of a single room, sorted by check-in date."""
+
+    def __init__(self, stays):
+        stays = sorted(stays)
+        self.starts = [check_in for check_in, _ in stays]
+        # reach[i] is the latest check-out among the first i + 1 stays
+        self.reach = list(accumulate((check_out for _, check_out in stays), max))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlaps(self, check_in, check_out):
+        # Stays starting before check_out are exactly starts[:i]; one of
+        # them overlaps when the furthest check-out among them is past check_in.
+        i = bisect_left(self.starts, check_out)
+        return i > 0 and self.reach[i - 1] > check_in
+
+
+class StayIndex:
+    """Stays accepted during a bulk write, per room, for checking the next ones.
+
+    The stays never overlap each other, so sorted check-ins also sort
+    check-outs and one bisect answers an overlap query.
+    """
+
+    def __init__(self):
+        self.starts = defaultdict(list)
+        self.ends = defaultdict(list)
+
+    def overlaps(self, room_id, check_in, check_out):
+        i = bisect_left(self.starts[room_id], check_out)
+        return i > 0 and self.ends[room_id][i - 1] > check_in
+
+    def add(self, room_id, check_in, check_out):
+        insort(self.starts[room_id], check_in)
+        insort(self.ends[room_id], check_out)
+
+
+def _load(room_ids):
+    stays = {room_id: [] for room_id in room_ids}
+    rows = (
+        Booking.objects
+        .filter(room_id__in=room_ids, confirmed=True)
+        .values_list('room_id', 'check_in', 'check_out')
+    )
+    for room_id, check_in, check_out in rows:
+        stays[room_id].append((check_in, check_out))
+    return {room_id: RoomSchedule(room_stays) for room_id, room_stays in stays.items()}
+
+
+def get_schedules(room_ids):
+    """Return {room_id: RoomSchedule}, rebuilding only stale rooms in one query."""
+    room_ids = [int(room_id) for room_id in room_ids]
+    names = {room_id: _version_name(room_id) for room_id in room_ids}
+    versions = get_versions(names.values())
+
+    schedules, stale = {}, []
+    with _lock:
+        for room_id in room_ids:
+            entry = _schedules.get(room_id)
+            if entry and entry[0] == versions[names[room_id]]:
+                schedules[room_id] = entry[1]
+            else:
+                stale.append(room_id)
+
+    if stale:
+        fresh = _load(stale)
+        with _lock:
+            for room_id, schedule in fresh.items():
+                _schedules[room_id] = (versions[names[room_id]], schedule)
+        schedules.update(fresh)
+    return schedules
+
+
+def is_available(room_id, check_in, check_out):
+    """True when no confirmed booking of the room overlaps [check_in, check_out)."""
+    schedule = get_schedules([room_id])[int(room_id)]
+    return not schedule.overlaps(check_in, check_out)
+
+
+def available_rooms(check_in, check_out, room_ids=None):
+    """Ids of the rooms (all rooms by default) that are free for the whole stay."""
+    if room_ids is None:
+        room_ids = Room.objects.values_list('id', flat=True)
+    schedules = get_schedules(room_ids)
+    return [
+        room_id for room_id, schedule in schedules.items()
+        if not schedule.overlaps(check_in, check_out)
+    ]
+
+
+def occupancy_calendar(start, days, room_ids=None):
+    """Return {room_id: bitmap} of confirmed occupancy for ``days`` nights from ``start``.
+
+    Each bitmap is a string with one character per night, ``'1'`` when the
+    room is taken.  All rooms are filled in a single pass over the confirmed
+    bookings touching the window.
+    """
+    end = start + timedelta(days=days)
+    rooms = Room.objects.all()
+    if room_ids is not None:
+        rooms = rooms.filter(id__in=room_ids)
+    bitmaps = {room_id: bytearray(b'0' * days) for room_id in rooms.values_list('id', flat=True)}
+
+    rows = (
+        Booking.objects
+        .filter(room_id__in=list(bitmaps), confirmed=True, check_in__lt=end, check_out__gt=start)
+        .values_list('room_id', 'check_in', 'check_out')
+    )
+    for room_id, check_in, check_out in rows:
+        first = max(0, (check_in - start).days)
+        last = min(days, (check_out - start).days)
+        bitmaps[room_id][first:last] = b'1' * (last - first)
+    return {room_id: bits.decode() for room_id, bits in bitmaps.items()}
+
+
+def invalidate(*room_ids):
+    """Drop the cached schedules of the given rooms in every process."""
+    if room_ids:
+        bump_version(*(_version_name(room_id) for room_id in room_ids))
+
+
+def clear():
+    """Forget every schedule held by this process."""
+    with _lock:
+        _schedules.clear()
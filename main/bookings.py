@@ -0,0 +1,231 @@
+"""Booking writes that must not double-book a room.
+
+The overlap check and the write happen in one transaction that first locks
+the room row (``SELECT ... FOR UPDATE`` on MySQL; on SQLite the IMMEDIATE
+transaction mode from ``APARTMENT.database`` takes the write lock up front),
+so two requests for the same room are serialised.  Lock contention is
+retried a bounded number of times before giving up.
+
+The admin's bulk actions work in chunks: each chunk locks its rooms, checks
+every booking against one query of confirmed stays, flips the rows with a
+single ``UPDATE`` and commits, and the guests are notified through one
+bulk insert into the outbox.
+"""
+import time
+from collections import defaultdict
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+
+from . import outbox, reports
+from .availability import RoomSchedule, StayIndex
+from .models import Booking, Room
+from .signals import bookings_changed
+
+BULK_CHUNK_SIZE = 500
+
+
+class BookingConflict(Exception):
+    """The room already has a confirmed booking overlapping these dates."""
+
+    def __init__(self, booking, conflicting_ids):
+        self.booking = booking
+        self.conflicting_ids = conflicting_ids
+        super().__init__(f"Room {booking.room_id} is already booked between {booking.check_in} and {booking.check_out}")
+
+
+def retry_on_contention(func):
+    """Retry ``func`` when the database reports a lock timeout or deadlock."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(settings.BOOKING_LOCK_RETRIES + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError:
+                if attempt == settings.BOOKING_LOCK_RETRIES:
+                    raise
+                time.sleep(settings.BOOKING_LOCK_BACKOFF * 2 ** attempt)
+    return wrapper
+
+
+def lock_room(room_id):
+    """Block other booking writers for this room until the transaction ends."""
+    Room.objects.select_for_update().filter(pk=room_id).values_list('pk', flat=True).first()
+
+
+def lock_rooms(room_ids):
+    """lock_room() for several rooms, in id order so writers cannot deadlock."""
+    list(Room.objects.select_for_update().filter(pk__in=sorted(room_ids)).values_list('pk', flat=True))
+
+
+def conflicting_bookings(booking):
+    return (
+        Booking.objects
+        .filter(room_id=booking.room_id, confirmed=True,
+                check_in__lt=booking.check_out, check_out__gt=booking.check_in)
+        .exclude(pk=booking.pk)
+    )
+
+
+@retry_on_contention
+def place_booking(booking, confirm=False):
+    """Save a new or edited booking unless it overlaps a confirmed stay.
+
+    New requests are refused only by confirmed bookings, matching what
+    check_availability shows the guest.  Raises BookingConflict.
+    """
+    with transaction.atomic():
+        lock_room(booking.room_id)
+        conflicts = list(conflicting_bookings(booking).values_list('pk', flat=True))
+        if conflicts:
+            raise BookingConflict(booking, conflicts)
+        if confirm:
+            booking.confirmed = True
+        booking.save()
+    return booking
+
+
+@retry_on_contention
+def confirm_booking(booking):
+    """Confirm one existing booking. Raises BookingConflict."""
+    with transaction.atomic():
+        lock_room(booking.room_id)
+        conflicts = list(conflicting_bookings(booking).values_list('pk', flat=True))
+        if conflicts:
+            raise BookingConflict(booking, conflicts)
+        booking.confirmed = True
+        booking.save(update_fields=['confirmed'])
+    return booking
+
+
+def confirmed_schedules(candidates):
+    """{room_id: RoomSchedule} of the confirmed stays overlapping any candidate, in one query."""
+    room_ids = {booking.room_id for booking in candidates}
+    rows = (
+        Booking.objects
+        .filter(
+            room_id__in=room_ids, confirmed=True,
+            check_in__lt=max(booking.check_out for booking in candidates),
+            check_out__gt=min(booking.check_in for booking in candidates),
+        )
+        .exclude(pk__in=[booking.pk for booking in candidates if booking.pk])
+        .values_list('room_id', 'check_in', 'check_out')
+    )
+    stays = defaultdict(list)
+    for room_id, check_in, check_out in rows:
+        stays[room_id].append((check_in, check_out))
+    return {room_id: RoomSchedule(stays[room_id]) for room_id in room_ids}
+
+
+def _chunks(pks, size):
+    for start in range(0, len(pks), size):
+        yield pks[start:start + size]
+
+
+def _refresh(pks):
+    """Availability and rollups after an UPDATE, which sends no signals.
+
+    Runs inside the chunk's transaction: the rollups commit with it, and the
+    cached availability is dropped once it has committed.
+    """
+    changed = Booking.objects.filter(pk__in=pks)
+    room_ids = list(changed.values_list('room_id', flat=True).distinct())
+    reports.refresh_for_bookings(changed)
+    transaction.on_commit(lambda: bookings_changed(*room_ids))
+
+
+def confirmation_email(booking):
+    return (
+        f'Booking Confirmed - {booking.room.title}',
+        f'Hello {booking.name},\n\n'
+        f'Your booking at UBWIZA Apartment is confirmed.\n\n'
+        f'Room: {booking.room.title}\n'
+        f'Check-in: {booking.check_in}\n'
+        f'Check-out: {booking.check_out}\n'
+        f'Guests: {booking.guests}\n'
+        f'Estimated Cost: {booking.estimated_cost()} RWF\n\n'
+        f'Best regards,\n'
+        f'UBWIZA Apartment Team',
+        [booking.email],
+    )
+
+
+def cancellation_email(booking):
+    return (
+        f'Booking Cancelled - {booking.room.title}',
+        f'Hello {booking.name},\n\n'
+        f'Your booking of {booking.room.title} from {booking.check_in} to {booking.check_out} '
+        f'has been cancelled. Please contact us if you have any questions.\n\n'
+        f'Best regards,\n'
+        f'UBWIZA Apartment Team',
+        [booking.email],
+    )
+
+
+@retry_on_contention
+def _confirm_chunk(pks, notify):
+    """Confirm the bookings ``pks`` that clash with nothing; returns (confirmed, conflicts)."""
+    confirmed, conflicts = [], []
+    with transaction.atomic():
+        pending = Booking.objects.filter(pk__in=pks, confirmed=False)
+        lock_rooms(set(pending.values_list('room_id', flat=True)))
+        chunk = list(pending.with_room().order_by('created_at', 'pk'))
+        if not chunk:
+            return confirmed, conflicts
+        schedules = confirmed_schedules(chunk)
+        accepted = StayIndex()
+        for booking in chunk:
+            args = booking.room_id, booking.check_in, booking.check_out
+            if schedules[booking.room_id].overlaps(*args[1:]) or accepted.overlaps(*args):
+                conflicts.append(booking)
+            else:
+                accepted.add(*args)
+                confirmed.append(booking)
+        if confirmed:
+            Booking.objects.filter(pk__in=[booking.pk for booking in confirmed]).update(confirmed=True)
+            _refresh([booking.pk for booking in confirmed])
+            if notify:
+                outbox.enqueue_many(confirmation_email(booking) for booking in confirmed)
+    for booking in confirmed:
+        booking.confirmed = True
+    return confirmed, conflicts
+
+
+def confirm_bookings(queryset, chunk_size=BULK_CHUNK_SIZE, notify=True):
+    """Confirm every booking in ``queryset`` that does not clash.
+
+    Bookings are handled oldest first, so when two selected requests
+    overlap the earlier one wins.  Each chunk commits on its own, together
+    with its rollups and queued emails, so a failure part way leaves the
+    chunks already done complete.  Returns (confirmed, conflicts) lists.
+    """
+    confirmed, conflicts = [], []
+    pks = list(queryset.filter(confirmed=False).order_by('created_at', 'pk').values_list('pk', flat=True))
+    for chunk in _chunks(pks, chunk_size):
+        chunk_confirmed, chunk_conflicts = _confirm_chunk(chunk, notify)
+        confirmed += chunk_confirmed
+        conflicts += chunk_conflicts
+    return confirmed, conflicts
+
+
+def cancel_bookings(queryset, chunk_size=BULK_CHUNK_SIZE, notify=True):
+    """Cancel the confirmed bookings in ``queryset``; returns how many were cancelled.
+
+    Selected bookings that were not confirmed are left alone.  Like
+    confirm_bookings(), each chunk commits with its rollups and emails.
+    """
+    count = 0
+    pks = list(queryset.filter(confirmed=True).values_list('pk', flat=True))
+    for chunk in _chunks(pks, chunk_size):
+        with transaction.atomic():
+            rows = list(
+                Booking.objects.select_for_update(of=('self',)).with_room().filter(pk__in=chunk, confirmed=True)
+            )
+            if not rows:
+                continue
+            count += Booking.objects.filter(pk__in=[booking.pk for booking in rows]).update(confirmed=False)
+            _refresh([booking.pk for booking in rows])
+            if notify:
+                outbox.enqueue_many(cancellation_email(booking) for booking in rows)
+    return count
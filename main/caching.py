@@ -0,0 +1,118 @@
+import time
+from functools import wraps
+from hashlib import md5
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+VERSION_PREFIX = 'version:'
+CHANGED_PREFIX = 'changed:'
+
+
+def _new_token():
+    return uuid4().hex[:12]
+
+
+def get_versions(names):
+    """Return {name: version token} for every name, creating missing ones.
+
+    Versions live in the default Django cache, so every process using the
+    same cache backend sees a bump; a process-local cache only sees its own,
+    which is why settings require a shared backend for several workers.
+    A token that expired (``CACHE_VERSION_TIMEOUT``) or was evicted is simply
+    replaced, which forces a rebuild instead of serving data built against
+    the old one.
+    """
+    keys = {VERSION_PREFIX + name: name for name in names}
+    found = cache.get_many(list(keys))
+    versions = {keys[key]: value for key, value in found.items()}
+    for key, name in keys.items():
+        if name not in versions:
+            cache.add(key, _new_token(), timeout=settings.CACHE_VERSION_TIMEOUT)
+            versions[name] = cache.get(key)
+    return versions
+
+
+def get_version(name):
+    return get_versions([name])[name]
+
+
+def bump_version(*names):
+    """Invalidate everything built against the given version names."""
+    now = int(time.time())
+    values = {VERSION_PREFIX + name: _new_token() for name in names}
+    values.update({CHANGED_PREFIX + name: now for name in names})
+    cache.set_many(values, timeout=settings.CACHE_VERSION_TIMEOUT)
+
+
+def last_changed(names):
+    """Unix time of the latest bump of any of ``names``.
+
+    A missing stamp (never bumped, or evicted) is set to now, so clients
+    holding an older copy revalidate instead of keeping stale data.
+    """
+    keys = [CHANGED_PREFIX + name for name in names]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, int(time.time()), timeout=settings.CACHE_VERSION_TIMEOUT)
+            found[key] = cache.get(key)
+    return max(found.values())
+
+
+# --- Public page caching ---
+# Version names bumped by main.signals when staff edit catalog data.
+CATALOG_VERSIONS = ['room', 'gallery', 'apartment']
+
+
+def page_cache_key(request, names, versions):
+    path = md5(request.get_full_path().encode()).hexdigest()
+    stamp = '.'.join(versions[name] for name in names)
+    return f'page:{request.resolver_match.view_name}:{path}:{stamp}'
+
+
+def cache_public_page(*names):
+    """Cache a public GET view's full response until one of ``names`` is bumped.
+
+    Only use this on pages that render nothing request-specific (no forms,
+    messages or user data).
+
+    Responses carry an ETag derived from the versions and a Last-Modified
+    from ``last_changed``, so a revalidating client or CDN gets a 304 before
+    the page cache is even read.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+
+            key = page_cache_key(request, names, get_versions(names))
+            etag = quote_etag(md5(key.encode()).hexdigest())
+            modified = last_changed(names)
+            response = get_conditional_response(request, etag=etag, last_modified=modified)
+            if response is None:
+                cached = cache.get(key)
+                if cached is not None:
+                    content, content_type = cached
+                    response = HttpResponse(content, content_type=content_type)
+                else:
+                    response = view_func(request, *args, **kwargs)
+                    if response.status_code != 200 or response.streaming:
+                        return response
+                    cache.set(
+                        key,
+                        (response.content, response['Content-Type']),
+                        settings.PAGE_CACHE_TIMEOUT,
+                    )
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(modified)
+            # Shared caches may keep the page but must revalidate every use
+            patch_cache_control(response, public=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
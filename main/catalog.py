@@ -0,0 +1,75 @@
+"""Filtering, ordering and facet counts for the public rooms listing."""
+from django.db.models import Count, Q
+
+from .models import Room
+
+PRICE_BUCKETS = {
+    'budget': Q(price__lt=50000),
+    'medium': Q(price__range=(50000, 100000)),
+    'premium': Q(price__gt=100000),
+}
+
+PRICE_RANGE_CHOICES = [
+    ('budget', 'Under 50,000 RWF'),
+    ('medium', '50,000 - 100,000 RWF'),
+    ('premium', 'Over 100,000 RWF'),
+]
+
+SORT_ORDERS = {
+    'featured': ('-is_featured', 'price', 'id'),
+    'price-low': ('price', 'id'),
+    'price-high': ('-price', 'id'),
+    'name': ('title', 'id'),
+}
+SORT_CHOICES = [
+    ('featured', 'Featured First'),
+    ('price-low', 'Price: Low to High'),
+    ('price-high', 'Price: High to Low'),
+    ('name', 'Name: A to Z'),
+]
+DEFAULT_SORT = 'featured'
+
+
+def clean_filters(params):
+    """Normalise ?type=&price=&sort= query parameters, dropping unknown values."""
+    room_type = params.get('type', '')
+    price_range = params.get('price', '')
+    sort = params.get('sort', DEFAULT_SORT)
+    return {
+        'type': room_type if room_type in dict(Room.ROOM_TYPES) else '',
+        'price': price_range if price_range in PRICE_BUCKETS else '',
+        'sort': sort if sort in SORT_ORDERS else DEFAULT_SORT,
+    }
+
+
+def filter_rooms(filters):
+    rooms = Room.objects.all()
+    if filters['type']:
+        rooms = rooms.filter(room_type=filters['type'])
+    if filters['price']:
+        rooms = rooms.filter(PRICE_BUCKETS[filters['price']])
+    return rooms.order_by(*SORT_ORDERS[filters['sort']])
+
+
+def room_facets(filters):
+    """Counts per room type and per price bucket from one grouped query.
+
+    Each facet honours the other facet's current selection, so the numbers
+    shown next to an option are what picking it would return.
+    """
+    rows = (
+        Room.objects
+        .values('room_type')
+        .annotate(total=Count('id'), **{
+            bucket: Count('id', filter=condition) for bucket, condition in PRICE_BUCKETS.items()
+        })
+        .order_by()
+    )
+    types = {code: 0 for code, _ in Room.ROOM_TYPES}
+    prices = {bucket: 0 for bucket in PRICE_BUCKETS}
+    for row in rows:
+        types[row['room_type']] = row[filters['price']] if filters['price'] else row['total']
+        if not filters['type'] or row['room_type'] == filters['type']:
+            for bucket in PRICE_BUCKETS:
+                prices[bucket] += row[bucket]
+    return {'type': types, 'price': prices}
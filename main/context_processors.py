@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .caching import CATALOG_VERSIONS, get_versions
+
+
+def cache_versions(request):
+    """Expose catalog versions for ``{% cache %}`` fragment keys.
+
+    Lazy, so pages without cached fragments never touch the cache.
+    """
+    return {
+        'cache_versions': SimpleLazyObject(lambda: get_versions(CATALOG_VERSIONS)),
+        'cache_timeout': settings.PAGE_CACHE_TIMEOUT,
+    }
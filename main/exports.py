@@ -0,0 +1,102 @@
+"""Streaming CSV / JSON Lines exports of bookings and contact messages.
+
+Rows are read with a server-side ``iterator()`` and written straight to the
+response, so memory stays flat however many rows are exported, under ASGI
+too (see ``main.streaming``).
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from . import streaming
+from .models import Booking, ContactMessage
+
+CHUNK_SIZE = 2000
+
+# dataset name -> (model, related fields to join, [(column, attribute path)])
+DATASETS = {
+    'bookings': (Booking, ['room'], [
+        ('id', 'id'),
+        ('room', 'room.title'),
+        ('name', 'name'),
+        ('email', 'email'),
+        ('phone', 'phone'),
+        ('check_in', 'check_in'),
+        ('check_out', 'check_out'),
+        ('guests', 'guests'),
+        ('confirmed', 'confirmed'),
+        ('created_at', 'created_at'),
+    ]),
+    'messages': (ContactMessage, [], [
+        ('id', 'id'),
+        ('name', 'name'),
+        ('email', 'email'),
+        ('message', 'message'),
+        ('sent_at', 'sent_at'),
+    ]),
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class Echo:
+    """File-like object whose write() just hands the line back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def _resolve(obj, path):
+    for attribute in path.split('.'):
+        obj = getattr(obj, attribute)
+    return obj
+
+
+def _records(queryset, related, columns):
+    fields = [path.replace('.', '__') for _, path in columns]
+    # only() on a queryset with deferred fields would still leave them deferred
+    queryset = queryset.select_related(*related).defer(None).only(*fields).order_by('pk')
+    for obj in queryset.iterator(chunk_size=CHUNK_SIZE):
+        yield [_resolve(obj, path) for _, path in columns]
+
+
+# Leading characters that make a spreadsheet read a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def csv_cell(value):
+    """``value``, quoted with a leading ' if a spreadsheet would run it as a formula."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_lines(queryset, related, columns):
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, _ in columns])
+    for record in _records(queryset, related, columns):
+        yield writer.writerow([csv_cell(value) for value in record])
+
+
+def _jsonl_lines(queryset, related, columns):
+    names = [name for name, _ in columns]
+    for record in _records(queryset, related, columns):
+        yield json.dumps(dict(zip(names, record)), cls=DjangoJSONEncoder) + '\n'
+
+
+def export_response(request, dataset, fmt, queryset=None):
+    """StreamingHttpResponse with ``dataset`` (optionally narrowed to ``queryset``) as ``fmt``."""
+    model, related, columns = DATASETS[dataset]
+    if queryset is None:
+        queryset = model.objects.all()
+    lines = _csv_lines if fmt == 'csv' else _jsonl_lines
+    response = StreamingHttpResponse(lines(queryset, related, columns), content_type=FORMATS[fmt])
+    filename = f"{dataset}-{timezone.now():%Y%m%d-%H%M}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return streaming.for_request(request, response)
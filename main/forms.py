@@ -1,7 +1,7 @@
 from django import forms
 from .models import Booking, ContactMessage, Room
 from django.core.exceptions import ValidationError
-from datetime import date
+from . import bookings, validation
 
 class BookingForm(forms.ModelForm):
     class Meta:
@@ -24,24 +24,43 @@ class BookingForm(forms.ModelForm):
         room = cleaned_data.get('room')
         guests = cleaned_data.get('guests')
         
-        # Date validation
-        if check_in and check_out:
-            if check_in < date.today():
-                raise ValidationError({'check_in': 'Check-in date cannot be in the past.'})
-            
-            if check_out <= check_in:
-                raise ValidationError({'check_out': 'Check-out date must be after check-in date.'})
-        
-        # Room capacity validation
-        if room and guests:
-            max_guests = 2 if room.room_type == 'single' else 4
-            if guests > max_guests:
-                raise ValidationError({
-                    'guests': f'This {room.room_type} room can accommodate maximum {max_guests} guests.'
-                })
+        errors = validation.booking_errors(check_in, check_out, room and room.room_type, guests)
+        if errors:
+            raise ValidationError(errors)
         
         return cleaned_data
 
+class BookingAdminForm(forms.ModelForm):
+    """Admin booking form: a confirmed booking may not overlap another confirmed stay.
+
+    Covers both confirming a request and editing the dates or room of a stay
+    that is already confirmed; the stored row stays as it was.
+    """
+    class Meta:
+        model = Booking
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        values = {
+            field: cleaned_data.get(field) if field in self.fields else getattr(self.instance, field)
+            for field in ('room', 'check_in', 'check_out', 'confirmed')
+        }
+        if not values['confirmed'] or None in values.values():
+            return cleaned_data
+        candidate = Booking(
+            pk=self.instance.pk, room=values['room'],
+            check_in=values['check_in'], check_out=values['check_out'],
+        )
+        conflicts = list(bookings.conflicting_bookings(candidate).values_list('pk', flat=True))
+        if conflicts:
+            # The changelist's list_editable rows only show field errors
+            self.add_error(
+                None if 'check_in' in self.fields else 'confirmed',
+                "This stay overlaps confirmed booking(s) #" + ", #".join(str(pk) for pk in conflicts) + ".",
+            )
+        return cleaned_data
+
 class ContactForm(forms.ModelForm):
     class Meta:
         model = ContactMessage
@@ -60,4 +79,15 @@ class ContactForm(forms.ModelForm):
                 'placeholder': 'How can we help you?',
                 'rows': 5
             }),
-        }
\ No newline at end of file
+        }
+
+
+class BookingImportForm(forms.Form):
+    file = forms.FileField(help_text='CSV or JSON Lines (.csv, .jsonl)')
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        self.format = upload.name.rsplit('.', 1)[-1].lower()
+        if self.format not in ('csv', 'jsonl'):
+            raise ValidationError('Upload a .csv or .jsonl file.')
+        return upload
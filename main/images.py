@@ -0,0 +1,111 @@
+"""Resized and WebP copies of uploaded images, stored beside the original.
+
+For ``rooms/garden.jpg`` and a width of 480 the derivatives are
+``rooms/garden_480w.jpg`` and ``rooms/garden_480w.webp``.  Originals
+narrower than a target width are re-encoded at their own size, so every
+configured width always exists once an image has been processed.
+"""
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# (model, image field name) pairs that get derivatives
+IMAGE_FIELDS = [
+    ('main.Room', 'image'),
+    ('main.Gallery', 'image'),
+    ('main.Apartment', 'photo'),
+]
+
+
+def derivative_name(name, width, fmt=None):
+    root, ext = os.path.splitext(name)
+    if fmt == 'webp':
+        ext = '.webp'
+    elif ext.lower() not in ('.jpg', '.jpeg', '.png'):
+        ext = '.jpg'
+    return f'{root}_{width}w{ext}'
+
+
+def has_derivatives(field_file):
+    """Cheap check (one stat) used to avoid pointing srcset at missing files."""
+    if not field_file:
+        return False
+    # The smallest WebP is written last, so it marks a complete set
+    name = derivative_name(field_file.name, min(settings.IMAGE_DERIVATIVE_WIDTHS), 'webp')
+    return field_file.storage.exists(name)
+
+
+def _encode(image, fmt):
+    buffer = BytesIO()
+    if fmt == 'WEBP':
+        image.save(buffer, 'WEBP', quality=settings.IMAGE_DERIVATIVE_QUALITY, method=4)
+    elif fmt == 'PNG':
+        image.save(buffer, 'PNG', optimize=True)
+    else:
+        image.convert('RGB').save(
+            buffer, 'JPEG', quality=settings.IMAGE_DERIVATIVE_QUALITY, optimize=True, progressive=True,
+        )
+    return ContentFile(buffer.getvalue())
+
+
+def generate_derivatives(field_file, force=False):
+    """Write every width in both the original format and WebP.
+
+    Returns the number of files written; existing derivatives are kept
+    unless ``force`` is set.
+    """
+    if not field_file:
+        return 0
+    if not force and has_derivatives(field_file):
+        return 0
+
+    storage = field_file.storage
+    with storage.open(field_file.name, 'rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+    base_format = 'PNG' if field_file.name.lower().endswith('.png') else 'JPEG'
+
+    written = 0
+    for width in sorted(settings.IMAGE_DERIVATIVE_WIDTHS, reverse=True):
+        resized = original
+        if original.width > width:
+            height = round(original.height * width / original.width)
+            resized = original.resize((width, height), Image.LANCZOS)
+        for fmt, suffix in ((base_format, None), ('WEBP', 'webp')):
+            name = derivative_name(field_file.name, width, suffix)
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, _encode(resized, fmt))
+            written += 1
+    return written
+
+
+def ensure_derivatives(field_file):
+    """Generate derivatives if missing; never lets a bad upload break a save."""
+    try:
+        return generate_derivatives(field_file)
+    except (OSError, ValueError) as exc:
+        logger.warning('Could not generate derivatives for %s: %s', field_file.name, exc)
+        return 0
+
+
+def srcset(field_file, fmt=None):
+    return ', '.join(
+        f'{field_file.storage.url(derivative_name(field_file.name, width, fmt))} {width}w'
+        for width in settings.IMAGE_DERIVATIVE_WIDTHS
+    )
+
+
+def thumbnail_url(field_file):
+    """URL of the smallest derivative, falling back to the original."""
+    if has_derivatives(field_file):
+        return field_file.storage.url(derivative_name(field_file.name, min(settings.IMAGE_DERIVATIVE_WIDTHS)))
+    return field_file.url
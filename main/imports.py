@@ -0,0 +1,252 @@
+"""Bulk booking import from CSV or JSON Lines.
+
+Rows are streamed from the file and handled in batches: each batch is
+validated with the booking rules of ``validation`` in one array pass,
+checked for overlaps against one query's worth of confirmed stays (plus
+stays accepted earlier in the same import), and inserted with ``bulk_create``.  The rooms of a batch are locked
+while it is checked and written, so live bookings cannot slip in between.
+Rejected rows are returned with their line number and reasons.
+
+Columns: ``room`` (id or exact title; ``room_id`` also accepted), ``name``,
+``email``, ``phone``, ``check_in``, ``check_out`` (YYYY-MM-DD), ``guests``
+and optionally ``confirmed``.  Extra columns, such as those of a booking
+export, are ignored.
+"""
+import csv
+import io
+import json
+from collections import defaultdict
+from datetime import date, timedelta
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.utils import timezone
+
+from . import reports, validation
+from .availability import StayIndex
+from .bookings import confirmed_schedules, lock_rooms, retry_on_contention
+from .exports import csv_cell
+from .models import Booking, Room
+from .signals import bookings_changed
+
+BATCH_SIZE = 5000
+INSERT_CHUNK_SIZE = 1000
+REQUIRED_COLUMNS = ['name', 'email', 'phone', 'check_in', 'check_out']
+# Largest value a PositiveIntegerField holds on every supported database
+MAX_GUESTS_VALUE = 2147483647
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.rejected = []  # (line number, raw row, [reasons])
+
+    def __repr__(self):
+        return f'<ImportResult imported={self.imported} rejected={len(self.rejected)}>'
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, dict) pairs from a text stream, one row at a time."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'jsonl':
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                row = {'_error': f'Invalid JSON: {exc}'}
+            yield number, row if isinstance(row, dict) else {'_error': 'Line is not a JSON object'}
+    else:
+        raise ValueError(f'Unknown import format: {fmt}')
+
+
+def text_stream(binary_file):
+    return io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+
+
+class RoomIndex:
+    """Room lookups by id or title, loaded once per import."""
+
+    def __init__(self):
+        self.types = {}
+        titles = defaultdict(list)
+        for room_id, title, room_type in Room.objects.values_list('id', 'title', 'room_type'):
+            self.types[room_id] = room_type
+            titles[title].append(room_id)
+        self.by_title = {title: ids[0] for title, ids in titles.items() if len(ids) == 1}
+
+    def resolve(self, value):
+        value = str(value if value is not None else '').strip()
+        if value.isdigit() and int(value) in self.types:
+            return int(value)
+        return self.by_title.get(value)
+
+
+def _parse(row, rooms):
+    """Return (field values, reasons) for the columns of one row.
+
+    The booking rules are applied to the whole batch afterwards, see
+    validation.validate_columns().
+    """
+    if '_error' in row:
+        return {}, [row['_error']]
+    errors = []
+    values = {}
+    for column in REQUIRED_COLUMNS:
+        value = str(row.get(column) if row.get(column) is not None else '').strip()
+        if not value:
+            errors.append(f'{column} is required')
+        values[column] = value
+
+    values['room_id'] = rooms.resolve(row.get('room_id', row.get('room')))
+    if values['room_id'] is None:
+        errors.append('Unknown room')
+
+    for column in ('check_in', 'check_out'):
+        if values[column]:
+            try:
+                values[column] = date.fromisoformat(values[column])
+            except ValueError:
+                errors.append(f'{column} must be a date (YYYY-MM-DD)')
+                values[column] = None
+        else:
+            values[column] = None
+    try:
+        values['guests'] = int(row.get('guests') or 1)
+        if not 1 <= values['guests'] <= MAX_GUESTS_VALUE:
+            raise ValueError
+    except (TypeError, ValueError):
+        errors.append('guests must be a positive whole number')
+        values['guests'] = None
+
+    if values['email']:
+        try:
+            validate_email(values['email'])
+        except ValidationError:
+            errors.append('Invalid email address')
+    if len(values['name']) > 100:
+        errors.append('name is longer than 100 characters')
+    if len(values['phone']) > 20:
+        errors.append('phone is longer than 20 characters')
+    values['confirmed'] = str(row.get('confirmed') or '').strip().lower() in TRUE_VALUES
+    return values, errors
+
+
+def _clean_batch(batch, rooms, today):
+    """Yield (line number, row, Booking or None, reasons) for a batch of rows."""
+    parsed = [_parse(row, rooms) for _, row in batch]
+    checks = validation.validate_columns(
+        [values.get('check_in') for values, _ in parsed],
+        [values.get('check_out') for values, _ in parsed],
+        [rooms.types.get(values.get('room_id'), '') for values, _ in parsed],
+        [values.get('guests') or 0 for values, _ in parsed],
+        today=today,
+    )
+    for index, ((number, row), (values, errors)) in enumerate(zip(batch, parsed)):
+        if not checks.valid[index]:
+            errors.extend(checks.errors(index).values())
+        if errors:
+            yield number, row, None, errors
+            continue
+        yield number, row, Booking(
+            room_id=values['room_id'], name=values['name'], email=values['email'], phone=values['phone'],
+            check_in=values['check_in'], check_out=values['check_out'], guests=values['guests'],
+            confirmed=values['confirmed'],
+        ), []
+
+
+@retry_on_contention
+def _write_batch(candidates, imported):
+    """Check ``candidates`` for overlaps under the room locks and insert the rest.
+
+    Returns (inserted bookings, [(candidate, reason)]).  ``imported`` is only
+    read here, so a retried attempt starts from the same state.
+    """
+    accepted, conflicts = [], []
+    in_batch = StayIndex()
+    with transaction.atomic():
+        lock_rooms({booking.room_id for booking in candidates})
+        schedules = confirmed_schedules(candidates)
+        for booking in candidates:
+            if schedules[booking.room_id].overlaps(booking.check_in, booking.check_out):
+                conflicts.append((booking, 'Overlaps a confirmed booking'))
+            elif any(stays.overlaps(booking.room_id, booking.check_in, booking.check_out) for stays in (imported, in_batch)):
+                conflicts.append((booking, 'Overlaps a confirmed booking earlier in this file'))
+            else:
+                accepted.append(booking)
+                if booking.confirmed:
+                    in_batch.add(booking.room_id, booking.check_in, booking.check_out)
+        Booking.objects.bulk_create(accepted, batch_size=INSERT_CHUNK_SIZE)
+    return accepted, conflicts
+
+
+def import_bookings(rows, batch_size=BATCH_SIZE):
+    """Import (line number, dict) rows; returns an ImportResult.
+
+    Each batch commits on its own, so a failure part-way keeps the batches
+    already imported.  Availability is refreshed after every committed batch;
+    report rollups once at the end, even when the import stops early.
+    """
+    result = ImportResult()
+    rooms = RoomIndex()
+    today = timezone.now().date()
+    imported = StayIndex()
+    spans = {}  # room_id -> (first day, last day) for the rollups
+
+    rows = iter(rows)
+    try:
+        while batch := list(islice(rows, batch_size)):
+            candidates, raw = [], {}
+            for number, row, booking, errors in _clean_batch(batch, rooms, today):
+                if errors:
+                    result.rejected.append((number, row, errors))
+                    continue
+                candidates.append(booking)
+                raw[id(booking)] = (number, row)
+            if not candidates:
+                continue
+
+            accepted, conflicts = _write_batch(candidates, imported)
+            result.imported += len(accepted)
+            for booking, reason in conflicts:
+                number, row = raw[id(booking)]
+                result.rejected.append((number, row, [reason]))
+            for booking in accepted:
+                if booking.confirmed:
+                    imported.add(booking.room_id, booking.check_in, booking.check_out)
+                first, last = spans.get(booking.room_id, (today, today))
+                spans[booking.room_id] = (
+                    min(first, booking.check_in), max(last, booking.check_out - timedelta(days=1)),
+                )
+            if accepted:
+                bookings_changed(*{booking.room_id for booking in accepted})
+    finally:
+        for room_id, (first, last) in spans.items():
+            reports.refresh_rollups(room_id, first, last)
+    result.rejected.sort(key=lambda rejected: rejected[0])
+    return result
+
+
+def write_rejects(result, stream):
+    """Write the rejected-rows report as CSV: line, reasons, then the row's own columns.
+
+    The partner's cells go through ``exports.csv_cell`` so none of them runs
+    as a formula when the report is opened in a spreadsheet.
+    """
+    columns = []
+    for _, row, _ in result.rejected:
+        for column in row:
+            if column not in columns and column != '_error':
+                columns.append(column)
+    writer = csv.writer(stream)
+    writer.writerow([csv_cell(cell) for cell in ['line', 'errors', *columns]])
+    for number, row, errors in result.rejected:
+        cells = [number, '; '.join(errors), *(row.get(column, '') for column in columns)]
+        writer.writerow([csv_cell(cell) for cell in cells])
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from main.pagination import refresh_statistics
+
+
+class Command(BaseCommand):
+    help = "Refresh the database statistics behind the query planner and the admin's estimated counts (run nightly)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        refresh_statistics(options['database'])
+        self.stdout.write(self.style.SUCCESS(f"Statistics refreshed in {time.perf_counter() - started:.2f}s"))
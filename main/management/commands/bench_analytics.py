@@ -0,0 +1,72 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from main import analytics
+from main.models import BILLING_PERIOD_NIGHTS
+
+
+class Command(BaseCommand):
+    help = "Time the vectorised room analytics against a per-booking loop on generated data"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=1_000_000)
+        parser.add_argument('--rooms', type=int, default=200)
+        parser.add_argument('--loop-sample', type=int, default=100_000,
+                            help='Bookings fed to the pure-Python baseline (extrapolated to the full set)')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def generate(self, bookings, rooms, seed):
+        rng = np.random.default_rng(seed)
+        base = np.datetime64('2024-01-01')
+        created = base + rng.integers(0, 730, bookings).astype('timedelta64[D]')
+        check_in = created + rng.integers(0, 120, bookings).astype('timedelta64[D]')
+        check_out = check_in + rng.integers(1, 90, bookings).astype('timedelta64[D]')
+        columns = {
+            'room': rng.integers(1, rooms + 1, bookings),
+            'check_in': check_in,
+            'check_out': check_out,
+            'created': created,
+        }
+        room_ids = np.arange(1, rooms + 1)
+        prices = rng.integers(100, 1000, rooms).astype(np.float64) * 1000
+        return columns, room_ids, prices
+
+    def loop(self, columns, room_ids, prices, start, end, today, count):
+        """The per-booking arithmetic the vectorised version replaces."""
+        price = dict(zip(room_ids.tolist(), prices.tolist()))
+        totals = {}
+        rows = zip(
+            columns['room'][:count].tolist(), columns['check_in'][:count].tolist(),
+            columns['check_out'][:count].tolist(), columns['created'][:count].tolist(),
+        )
+        for room_id, check_in, check_out, created in rows:
+            entry = totals.setdefault(room_id, [0, 0, 0, 0, 0.0])
+            nights = (check_out - check_in).days
+            entry[0] += 1
+            entry[1] += max(0, (min(check_out, end) - max(check_in, start)).days)
+            entry[2] += nights
+            entry[3] += max(0, (check_in - created).days)
+            if check_in >= today:
+                entry[4] += price[room_id] * max(1, nights // BILLING_PERIOD_NIGHTS)
+        return totals
+
+    def handle(self, *args, **options):
+        count = options['bookings']
+        columns, room_ids, prices = self.generate(count, options['rooms'], options['seed'])
+        start, end, today = (np.datetime64(day, 'D').item() for day in ('2025-01-01', '2025-04-01', '2025-06-01'))
+
+        started = time.perf_counter()
+        analytics.room_metrics(columns, room_ids, prices, start, end, today)
+        vectorised = time.perf_counter() - started
+
+        sample = min(options['loop_sample'], count)
+        started = time.perf_counter()
+        self.loop(columns, room_ids, prices, start, end, today, sample)
+        looped = (time.perf_counter() - started) * count / max(sample, 1)
+
+        self.stdout.write(f"Bookings: {count}, rooms: {options['rooms']}")
+        self.stdout.write(f"Vectorised: {vectorised:.3f}s")
+        self.stdout.write(f"Per-booking loop: {looped:.3f}s (extrapolated from {sample} bookings)")
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {looped / vectorised:.1f}x"))
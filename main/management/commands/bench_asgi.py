@@ -0,0 +1,170 @@
+import asyncio
+import random
+import threading
+import time
+from datetime import timedelta
+from io import BytesIO
+from urllib.parse import urlencode
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+
+from .bench_endpoints import Command as EndpointBenchmark, summarize
+
+ASGI_ENDPOINTS = ['check_availability', 'booking_post', 'contact_post', 'home']
+
+
+class Command(EndpointBenchmark):
+    endpoints = ASGI_ENDPOINTS
+    help = (
+        "Compare WSGI and ASGI throughput for the async views at the same concurrency: "
+        "WSGI runs --concurrency threads, ASGI one event loop with --concurrency requests in flight"
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(output='bench_asgi.json')
+
+    def request_spec(self, endpoint, rng):
+        """(method, path, query string, form data, extra headers) for one request."""
+        check_in = self.last_day + timedelta(days=rng.randint(1, 365))
+        check_out = check_in + timedelta(days=rng.randint(1, 10))
+        if endpoint == 'check_availability':
+            query = {'check_in': check_in.isoformat(), 'check_out': check_out.isoformat()}
+            if rng.random() < 0.5:
+                query['room_id'] = rng.choice(self.room_ids)
+            return 'GET', '/check-availability/', urlencode(query), None, {'x-requested-with': 'XMLHttpRequest'}
+        if endpoint == 'booking_post':
+            return 'POST', '/booking/', '', {
+                'room': rng.choice(self.room_ids), 'name': 'Load Test', 'email': 'load@example.com',
+                'phone': '0788000000', 'check_in': check_in.isoformat(),
+                'check_out': check_out.isoformat(), 'guests': 2,
+            }, {}
+        if endpoint == 'contact_post':
+            return 'POST', '/contact/', '', {
+                'name': 'Load Test', 'email': 'load@example.com', 'message': 'Is parking available?',
+            }, {}
+        return 'GET', '/', '', None, {}
+
+    def encode(self, data, headers):
+        """Form body plus headers, with a valid CSRF cookie/token pair for POSTs."""
+        headers = dict(headers, host='testserver')
+        if data is None:
+            return b'', headers
+        request = HttpRequest()
+        token = get_token(request)
+        headers['cookie'] = f"csrftoken={request.META['CSRF_COOKIE']}"
+        headers['content-type'] = 'application/x-www-form-urlencoded'
+        return urlencode(dict(data, csrfmiddlewaretoken=token)).encode(), headers
+
+    # --- WSGI: a thread per concurrent request, like a threaded WSGI server ---
+    def run_wsgi(self, endpoint, options):
+        application = WSGIHandler()
+        samples = []
+        lock = threading.Lock()
+
+        def call(rng):
+            method, path, query, data, headers = self.request_spec(endpoint, rng)
+            body, headers = self.encode(data, headers)
+            environ = {
+                'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': query,
+                'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+                'wsgi.url_scheme': 'http', 'wsgi.input': BytesIO(body), 'CONTENT_LENGTH': str(len(body)),
+                'CONTENT_TYPE': headers.pop('content-type', ''),
+            }
+            environ.update({'HTTP_' + name.upper().replace('-', '_'): value for name, value in headers.items()})
+            status = []
+            response = application(environ, lambda line, response_headers: status.append(int(line[:3])))
+            try:
+                b''.join(response)
+            finally:
+                response.close()
+            return status[0]
+
+        def worker(first):
+            for index in range(first, options['requests'], options['concurrency']):
+                rng = random.Random(f"{options['seed']}-{endpoint}-{index}")
+                started = time.perf_counter()
+                status = call(rng)
+                with lock:
+                    samples.append((time.perf_counter() - started, None, status))
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(options['concurrency'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return summarize(samples, time.perf_counter() - started)
+
+    # --- ASGI: one event loop, like a single uvicorn worker ---
+    def run_asgi(self, endpoint, options):
+        application = ASGIHandler()
+
+        async def call(rng):
+            method, path, query, data, headers = self.request_spec(endpoint, rng)
+            body, headers = self.encode(data, headers)
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+                'query_string': query.encode(), 'root_path': '',
+                'headers': [(name.encode(), value.encode()) for name, value in headers.items()],
+                'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+            }
+            pending = [{'type': 'http.request', 'body': body, 'more_body': False}]
+            disconnected = asyncio.Event()
+            status = []
+
+            async def receive():
+                if pending:
+                    return pending.pop()
+                await disconnected.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            await application(scope, receive, send)
+            disconnected.set()
+            return status[0]
+
+        async def run():
+            samples = []
+
+            async def worker(first):
+                for index in range(first, options['requests'], options['concurrency']):
+                    rng = random.Random(f"{options['seed']}-{endpoint}-{index}")
+                    started = time.perf_counter()
+                    status = await call(rng)
+                    samples.append((time.perf_counter() - started, None, status))
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(n) for n in range(options['concurrency'])))
+            return summarize(samples, time.perf_counter() - started)
+
+        return asyncio.run(run())
+
+    def run_all(self, options):
+        results = {'meta': self.meta(options), 'endpoints': {}}
+        for endpoint in options['endpoint'] or self.endpoints:
+            self.stdout.write(f"Benchmarking {endpoint}...")
+            wsgi = self.run_wsgi(endpoint, options)
+            asgi = self.run_asgi(endpoint, options)
+            results['endpoints'][endpoint] = {
+                'wsgi': wsgi,
+                'asgi': asgi,
+                'asgi_speedup': round(asgi['throughput_rps'] / wsgi['throughput_rps'], 2),
+            }
+        return results
+
+    def report(self, results, baseline_path):
+        self.stdout.write(f"{'endpoint':<20}{'wsgi rps':>10}{'asgi rps':>10}{'wsgi p95':>10}{'asgi p95':>10}{'speedup':>9}")
+        for endpoint, stats in results['endpoints'].items():
+            wsgi, asgi = stats['wsgi'], stats['asgi']
+            self.stdout.write(
+                f"{endpoint:<20}{wsgi['throughput_rps']:>10}{asgi['throughput_rps']:>10}"
+                f"{wsgi['p95_ms']:>10}{asgi['p95_ms']:>10}{stats['asgi_speedup']:>8}x"
+            )
@@ -0,0 +1,53 @@
+import threading
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+
+from main.models import Booking, Room
+
+
+class Command(BaseCommand):
+    help = "Measure concurrent booking-insert throughput on the configured database profile"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--bookings', type=int, default=200, help='Bookings inserted per thread')
+
+    def handle(self, *args, **options):
+        threads, per_thread = options['threads'], options['bookings']
+        room = Room.objects.create(title='Benchmark room', room_type='suite', price=0, image='')
+        errors = []
+
+        def worker(index):
+            start = date(2100, 1, 1) + timedelta(days=index * per_thread * 2)
+            try:
+                for n in range(per_thread):
+                    check_in = start + timedelta(days=n * 2)
+                    try:
+                        Booking.objects.create(
+                            room=room, name=f'bench {index}-{n}', email='bench@example.com', phone='0',
+                            check_in=check_in, check_out=check_in + timedelta(days=1),
+                        )
+                    except OperationalError as exc:
+                        errors.append(str(exc))
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        inserted = Booking.objects.filter(room=room).count()
+        room.delete()
+
+        self.stdout.write(f"Profile: {connection.vendor} ({connection.settings_dict['NAME']})")
+        self.stdout.write(f"Threads: {threads}, attempted: {threads * per_thread}, inserted: {inserted}, errors: {len(errors)}")
+        self.stdout.write(self.style.SUCCESS(f"Throughput: {inserted / elapsed:.0f} inserts/s over {elapsed:.2f}s"))
+        if errors:
+            self.stdout.write(self.style.WARNING(f"First error: {errors[0]}"))
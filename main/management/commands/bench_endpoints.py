@@ -0,0 +1,238 @@
+import json
+import random
+import statistics
+import subprocess
+import threading
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from main import availability, reports
+from main.caching import bump_version
+from main.models import Apartment, Booking, Gallery, Room
+
+ENDPOINTS = [
+    'home', 'rooms', 'room_detail', 'gallery', 'booking_get', 'booking_post', 'contact_post', 'check_availability',
+]
+
+
+def summarize(samples, elapsed):
+    """Latency percentiles, throughput and query counts of (seconds, queries, status) samples.
+
+    ``queries`` may be None when they were not counted.
+    """
+    latencies = sorted(seconds * 1000 for seconds, _, _ in samples)
+    statuses = {}
+    for _, _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    summary = {
+        'requests': len(samples),
+        'errors': sum(count for status, count in statuses.items() if int(status) >= 500),
+        'status_counts': statuses,
+        'throughput_rps': round(len(samples) / elapsed, 1),
+        'mean_ms': round(statistics.fmean(latencies), 2),
+        'p50_ms': round(cuts[49], 2),
+        'p95_ms': round(cuts[94], 2),
+        'p99_ms': round(cuts[98], 2),
+    }
+    queries = [count for _, count, _ in samples if count is not None]
+    if queries:
+        summary['queries_mean'] = round(statistics.fmean(queries), 2)
+        summary['queries_max'] = max(queries)
+    return summary
+
+
+class Command(BaseCommand):
+    endpoints = ENDPOINTS
+    help = (
+        "Seed a synthetic dataset in a throwaway test database, drive the public "
+        "endpoints concurrently and write latency, throughput and query counts as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=60)
+        parser.add_argument('--gallery', type=int, default=200)
+        parser.add_argument('--apartments', type=int, default=5)
+        parser.add_argument('--bookings', type=int, default=20000)
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--endpoint', action='append', choices=self.endpoints, help='Only these endpoints (repeatable)')
+        parser.add_argument('--output', default='bench_endpoints.json')
+        parser.add_argument('--baseline', help='Earlier JSON result to compare p95 latency against')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.seed(options)
+            results = self.run_all(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            # Cached pages and schedules were built from the synthetic data
+            bump_version('room', 'gallery', 'apartment', 'booking', 'contactmessage')
+            availability.clear()
+
+        with open(options['output'], 'w') as output:
+            json.dump(results, output, indent=2)
+        self.report(results, options['baseline'])
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    # --- Dataset ---
+    def seed(self, options):
+        """Bulk-insert the dataset; confirmed stays never overlap within a room."""
+        rng = random.Random(options['seed'])
+        Room.objects.bulk_create(
+            Room(
+                title=f'Room {n}', room_type=rng.choice(Room.ROOM_TYPES)[0],
+                price=rng.randrange(20, 500) * 1000, description='Synthetic benchmark room.',
+                image=f'rooms/bench_{n}.jpg', is_featured=n % 5 == 0,
+            )
+            for n in range(options['rooms'])
+        )
+        Gallery.objects.bulk_create(
+            Gallery(title=f'Photo {n}', image=f'gallery/bench_{n}.jpg') for n in range(options['gallery'])
+        )
+        Apartment.objects.bulk_create(
+            Apartment(name=f'Apartment {n}', description='Synthetic apartment.', photo=f'apartments/photos/bench_{n}.jpg')
+            for n in range(options['apartments'])
+        )
+
+        self.room_ids = list(Room.objects.values_list('id', flat=True))
+        per_room = max(1, options['bookings'] // max(len(self.room_ids), 1))
+        start = date.today() - timedelta(days=365)
+        batch = []
+        for room_id in self.room_ids:
+            day = start
+            for n in range(per_room):
+                day += timedelta(days=rng.randint(0, 3))
+                nights = rng.randint(1, 14)
+                batch.append(Booking(
+                    room_id=room_id, name=f'Guest {n}', email='guest@example.com', phone='0',
+                    check_in=day, check_out=day + timedelta(days=nights),
+                    guests=rng.randint(1, 4), confirmed=rng.random() < 0.7,
+                ))
+                day += timedelta(days=nights)
+        Booking.objects.bulk_create(batch, batch_size=2000)
+        # bulk_create sends no signals, so refresh derived data by hand
+        reports.rebuild(start, day)
+        bump_version('room', 'gallery', 'apartment', 'booking', 'contactmessage')
+        availability.invalidate(*self.room_ids)
+        self.last_day = day
+
+    # --- Requests ---
+    def make_request(self, client, endpoint, rng):
+        if endpoint == 'home':
+            return client.get('/')
+        if endpoint == 'rooms':
+            return client.get('/rooms/', {'page': rng.randint(1, 3)})
+        if endpoint == 'room_detail':
+            return client.get(f'/rooms/{rng.choice(self.room_ids)}/')
+        if endpoint == 'gallery':
+            return client.get('/gallery/')
+        if endpoint == 'booking_get':
+            return client.get('/booking/')
+        if endpoint == 'contact_post':
+            return client.post('/contact/', {
+                'name': 'Load Test', 'email': 'load@example.com', 'message': 'Is parking available?',
+            })
+        check_in = self.last_day + timedelta(days=rng.randint(1, 365))
+        check_out = check_in + timedelta(days=rng.randint(1, 10))
+        if endpoint == 'booking_post':
+            return client.post('/booking/', {
+                'room': rng.choice(self.room_ids), 'name': 'Load Test', 'email': 'load@example.com',
+                'phone': '0788000000', 'check_in': check_in.isoformat(),
+                'check_out': check_out.isoformat(), 'guests': 2,
+            })
+        params = {'check_in': check_in.isoformat(), 'check_out': check_out.isoformat()}
+        if rng.random() < 0.5:
+            params['room_id'] = rng.choice(self.room_ids)
+        return client.get('/check-availability/', params, headers={'X-Requested-With': 'XMLHttpRequest'})
+
+    def run_endpoint(self, endpoint, options):
+        """Spread ``requests`` calls over ``concurrency`` threads, each with its own client."""
+        samples = []
+        lock = threading.Lock()
+
+        def worker(first):
+            client = Client()
+            try:
+                for index in range(first, options['requests'], options['concurrency']):
+                    rng = random.Random(f"{options['seed']}-{endpoint}-{index}")
+                    queries = []
+
+                    def count_query(execute, sql, params, many, context):
+                        queries.append(sql)
+                        return execute(sql, params, many, context)
+
+                    started = time.perf_counter()
+                    with connection.execute_wrapper(count_query):
+                        response = self.make_request(client, endpoint, rng)
+                    sample = (time.perf_counter() - started, len(queries), response.status_code)
+                    with lock:
+                        samples.append(sample)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(options['concurrency'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        return summarize(samples, elapsed)
+
+    def meta(self, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR,
+            ).stdout.strip() or None
+        except OSError:
+            commit = None
+        return {
+            'timestamp': timezone.now().isoformat(),
+            'commit': commit,
+            'database': connection.vendor,
+            'cache': settings.CACHES['default']['BACKEND'],
+            'concurrency': options['concurrency'],
+            'requests_per_endpoint': options['requests'],
+            'dataset': {
+                'rooms': Room.objects.count(),
+                'gallery': Gallery.objects.count(),
+                'apartments': Apartment.objects.count(),
+                'bookings': Booking.objects.count(),
+            },
+        }
+
+    def run_all(self, options):
+        results = {'meta': self.meta(options), 'endpoints': {}}
+        for endpoint in options['endpoint'] or self.endpoints:
+            self.stdout.write(f"Benchmarking {endpoint}...")
+            results['endpoints'][endpoint] = self.run_endpoint(endpoint, options)
+        return results
+
+    def report(self, results, baseline_path):
+        baseline = {}
+        if baseline_path:
+            with open(baseline_path) as baseline_file:
+                baseline = json.load(baseline_file).get('endpoints', {})
+        self.stdout.write(f"{'endpoint':<20}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}")
+        for endpoint, stats in results['endpoints'].items():
+            line = (
+                f"{endpoint:<20}{stats['throughput_rps']:>9}{stats['p50_ms']:>9}"
+                f"{stats['p95_ms']:>9}{stats['p99_ms']:>9}{stats.get('queries_mean', '-'):>9}"
+            )
+            if endpoint in baseline and baseline[endpoint]['p95_ms']:
+                change = 100 * (stats['p95_ms'] / baseline[endpoint]['p95_ms'] - 1)
+                line += f"   p95 {change:+.1f}% vs baseline"
+            self.stdout.write(line)
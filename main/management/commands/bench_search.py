@@ -0,0 +1,87 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from main import search
+from main.caching import bump_version
+from main.models import ContactMessage
+
+WORDS = (
+    'room suite garden view quiet balcony parking breakfast wifi kitchen lake city market airport '
+    'shuttle family double single bed bath shower terrace pool gym laundry booking price month week '
+    'weekend stay guest host welcome clean bright spacious modern cosy central calm'
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Time full-text queries as the number of indexed messages grows, "
+        "on the FTS5 table and on the in-memory index, in a throwaway test database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 300_000])
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # A rare word matches a handful of messages, two common words most of them
+        rare = [f'tag{n}' for n in range(5000)]
+        queries = {
+            'rare': [rng.choice(rare) for _ in range(options['queries'])],
+            'common': [' '.join(rng.sample(WORDS, 2)) for _ in range(options['queries'])],
+        }
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(
+                f"{'messages':>10}{'fts rare':>10}{'fts common':>12}{'memory rare':>13}{'memory common':>15}"
+            )
+            indexed = 0
+            for size in sorted(options['sizes']):
+                ContactMessage.objects.bulk_create(
+                    ContactMessage(
+                        name=f'Guest {n}', email=f'guest{n}@example.com',
+                        message=' '.join(rng.choices(WORDS, k=30) + [rng.choice(rare)]),
+                    )
+                    for n in range(indexed, size)
+                )
+                indexed = size
+                # bulk_create sends no signals
+                search.rebuild()
+                fts = self.time_queries(queries)
+                search._fts_databases[connection.settings_dict['NAME']] = False
+                try:
+                    search.rebuild()
+                    search.search('warm up')
+                    memory = self.time_queries(queries)
+                finally:
+                    search._fts_databases.pop(connection.settings_dict['NAME'], None)
+                self.stdout.write(
+                    f"{size:>10}{fts['rare']:>10.2f}{fts['common']:>12.2f}"
+                    f"{memory['rare']:>13.2f}{memory['common']:>15.2f}"
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            # The in-memory index was built from the synthetic data
+            bump_version(*search.VERSION_NAMES.values())
+        self.stdout.write(self.style.SUCCESS("Median latency in milliseconds for the top 20 results"))
+
+    def time_queries(self, queries):
+        """{group: median milliseconds} over each group of queries."""
+        medians = {}
+        for group, group_queries in queries.items():
+            latencies = []
+            for query in group_queries:
+                started = time.perf_counter()
+                search.search(query, kinds=['message'], limit=20)
+                latencies.append((time.perf_counter() - started) * 1000)
+            medians[group] = statistics.median(latencies)
+        return medians
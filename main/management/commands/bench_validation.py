@@ -0,0 +1,63 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from main import validation
+from main.models import Room
+
+
+class Command(BaseCommand):
+    help = "Time batched booking validation against one booking_errors() call per candidate on generated data"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidates', type=int, default=1_000_000)
+        parser.add_argument('--loop-sample', type=int, default=100_000,
+                            help='Candidates fed to the per-row baseline (extrapolated to the full set)')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def generate(self, count, seed):
+        """Candidate columns with a share of each kind of rule violation."""
+        rng = np.random.default_rng(seed)
+        today = np.datetime64('2025-06-01')
+        check_in = today + rng.integers(-30, 365, count).astype('timedelta64[D]')
+        check_out = check_in + rng.integers(-2, 30, count).astype('timedelta64[D]')
+        room_types = np.array([room_type for room_type, _ in Room.ROOM_TYPES])
+        room_type = room_types[rng.integers(0, len(room_types), count)]
+        guests = rng.integers(1, 6, count)
+        return {'check_in': check_in, 'check_out': check_out, 'room_type': room_type, 'guests': guests}, today.item()
+
+    def loop(self, columns, today, count):
+        """The per-row path the form takes, one call per candidate."""
+        rows = zip(
+            columns['check_in'][:count].tolist(), columns['check_out'][:count].tolist(),
+            columns['room_type'][:count].tolist(), columns['guests'][:count].tolist(),
+        )
+        return sum(1 for row in rows if validation.booking_errors(*row, today=today))
+
+    def handle(self, *args, **options):
+        count = options['candidates']
+        columns, today = self.generate(count, options['seed'])
+
+        started = time.perf_counter()
+        checks = validation.validate_columns(
+            columns['check_in'], columns['check_out'], columns['room_type'], columns['guests'], today=today,
+        )
+        batched = time.perf_counter() - started
+
+        sample = min(options['loop_sample'], count)
+        started = time.perf_counter()
+        looped_invalid = self.loop(columns, today, sample)
+        looped = (time.perf_counter() - started) * count / max(sample, 1)
+        if looped_invalid != int((~checks.valid[:sample]).sum()):
+            self.stderr.write(self.style.ERROR("Batched and per-row validation disagree on the sample"))
+
+        counts = checks.counts()
+        self.stdout.write(f"Candidates: {count}, today: {today}")
+        self.stdout.write(
+            f"Rejected: {counts['invalid']} (past check-in {counts['check_in']}, "
+            f"check-out order {counts['check_out']}, over capacity {counts['guests']})"
+        )
+        self.stdout.write(f"Batched: {batched:.3f}s")
+        self.stdout.write(f"Per-row loop: {looped:.3f}s (extrapolated from {sample} candidates)")
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {looped / batched:.1f}x"))
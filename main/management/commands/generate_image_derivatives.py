@@ -0,0 +1,29 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from main.images import IMAGE_FIELDS, generate_derivatives
+
+
+class Command(BaseCommand):
+    help = "Generate resized and WebP derivatives for existing Room, Gallery and Apartment images"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate derivatives that already exist')
+
+    def handle(self, *args, **options):
+        for label, field_name in IMAGE_FIELDS:
+            model = apps.get_model(label)
+            processed = written = failed = 0
+            for obj in model.objects.only('pk', field_name).iterator(chunk_size=500):
+                field_file = getattr(obj, field_name)
+                if not field_file:
+                    continue
+                try:
+                    written += generate_derivatives(field_file, force=options['force'])
+                except (OSError, ValueError) as exc:
+                    failed += 1
+                    self.stderr.write(f"{label} #{obj.pk} ({field_file.name}): {exc}")
+                processed += 1
+            self.stdout.write(self.style.SUCCESS(
+                f"{label}.{field_name}: {processed} images checked, {written} files written, {failed} failed"
+            ))
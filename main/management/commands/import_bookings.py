@@ -0,0 +1,36 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main import imports
+
+
+class Command(BaseCommand):
+    help = "Import bookings from a CSV or JSON Lines file in validated, bulk-inserted batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--rejects', help='Where to write the rejected-rows CSV (default: <path>.rejects.csv)')
+        parser.add_argument('--batch-size', type=int, default=imports.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if fmt not in ('csv', 'jsonl'):
+            raise CommandError('Cannot tell the format from the file name; pass --format csv or --format jsonl')
+
+        started = time.perf_counter()
+        with open(path, encoding='utf-8-sig', newline='') as stream:
+            result = imports.import_bookings(imports.read_rows(stream, fmt), options['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.imported} bookings in {elapsed:.2f}s, rejected {len(result.rejected)} rows"
+        ))
+        if result.rejected:
+            rejects = options['rejects'] or f'{path}.rejects.csv'
+            with open(rejects, 'w', newline='') as stream:
+                imports.write_rejects(result, stream)
+            self.stdout.write(self.style.WARNING(f"Rejected rows written to {rejects}"))
@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main import reports
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r}, expected YYYY-MM-DD")
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily booking rollups used by the booking report"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=parse_date, help='First day to rebuild (default: earliest booking)')
+        parser.add_argument('--end', type=parse_date, help='Last day to rebuild (default: latest booking)')
+
+    def handle(self, *args, **options):
+        rows = reports.rebuild(options['start'], options['end'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} rollup rows"))
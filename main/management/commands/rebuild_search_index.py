@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main import search
+
+
+class Command(BaseCommand):
+    help = "Re-index every room, apartment and contact message for full-text search"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        search.rebuild()
+        backend = 'FTS5 table' if search.uses_fts() else 'in-memory indexes (rebuilt on next use)'
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt in {time.perf_counter() - started:.2f}s: {backend}"))
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.outbox import send_due
+
+
+class Command(BaseCommand):
+    help = "Send queued booking and contact emails (run a single worker)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help='Keep polling the queue instead of exiting when it is empty')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep between polls with --loop')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            try:
+                sent, failed = send_due(batch_size=options['batch_size'])
+            except Exception as exc:
+                # A database hiccup should not stop a long-running worker
+                if not options['loop']:
+                    raise
+                self.stderr.write(f"Sending queued mail failed: {exc}")
+                sent = failed = 0
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f"Sent {sent}, failed {failed}")
+            # Pause when the queue is drained or nothing could be sent, e.g. the server is down
+            if sent + failed < options['batch_size'] or not sent:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f"Done: {total_sent} sent, {total_failed} failed"))
@@ -0,0 +1,81 @@
+import gzip
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+from whitenoise.compress import Compressor
+
+from main.assets import minify
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PAGES = ['home', 'rooms', 'gallery', 'about', 'contact', 'booking']
+
+
+class Command(BaseCommand):
+    help = "Report, per page, the static bytes saved by minification and pre-compression"
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='Page paths to check (default: the public pages)')
+
+    def source_name(self, url):
+        """Static file name for a rendered URL, undoing manifest hashing if needed."""
+        name = url[len(settings.STATIC_URL):].split('?')[0]
+        if finders.find(name):
+            return name
+        unhashed = {hashed: original for original, hashed in getattr(staticfiles_storage, 'hashed_files', {}).items()}
+        return unhashed.get(name)
+
+    def sizes(self, name):
+        """(original, shipped) byte counts for one asset."""
+        with open(finders.find(name), 'rb') as source:
+            content = source.read()
+        original = len(content)
+        if name in settings.STATIC_MINIFY:
+            content = minify(name, content.decode('utf-8')).encode('utf-8')
+        shipped = [len(content)]
+        if Compressor(quiet=True).should_compress(name):
+            shipped.append(len(gzip.compress(content, 9)))
+            if brotli is not None:
+                shipped.append(len(brotli.compress(content)))
+        return original, min(shipped)
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or [reverse(name) for name in PAGES]
+        pattern = re.compile(r'(?:href|src)="(%s[^"]+)"' % re.escape(settings.STATIC_URL))
+        client = Client()
+        total_original = total_shipped = 0
+
+        for path in paths:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                response = client.get(path)
+            if response.status_code != 200:
+                self.stdout.write(self.style.WARNING(f"{path}: HTTP {response.status_code}, skipped"))
+                continue
+            names = {self.source_name(url) for url in pattern.findall(response.content.decode())}
+            names.discard(None)
+            original = shipped = 0
+            for name in sorted(names):
+                file_original, file_shipped = self.sizes(name)
+                original += file_original
+                shipped += file_shipped
+            total_original += original
+            total_shipped += shipped
+            saved = original - shipped
+            percent = 100 * saved / original if original else 0
+            self.stdout.write(
+                f"{path}: {len(names)} assets, {original} -> {shipped} bytes, saved {saved} ({percent:.1f}%)"
+            )
+
+        saved = total_original - total_shipped
+        self.stdout.write(self.style.SUCCESS(
+            f"Total: {total_original} -> {total_shipped} bytes, saved {saved}"
+            + ('' if brotli else ' (gzip only; install Brotli for .br files)')
+        ))
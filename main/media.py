@@ -0,0 +1,42 @@
+"""Uploaded media served with validators, so repeat requests are cheap 304s.
+
+Every file gets an ETag from its modification time and size plus a
+Last-Modified header; a conditional request is answered from one ``stat``
+without opening the file.
+"""
+import mimetypes
+import posixpath
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from . import streaming
+
+
+def serve(request, path):
+    try:
+        fullpath = Path(safe_join(settings.MEDIA_ROOT, posixpath.normpath(path).lstrip('/')))
+    except SuspiciousFileOperation:
+        raise Http404('Media file not found')
+    if not fullpath.is_file():
+        raise Http404('Media file not found')
+
+    stat = fullpath.stat()
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        content_type, encoding = mimetypes.guess_type(fullpath.name)
+        response = FileResponse(fullpath.open('rb'), content_type=content_type or 'application/octet-stream')
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response = streaming.for_request(request, response)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    # Derivatives can be regenerated under the same name, so not immutable
+    patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+    return response
@@ -0,0 +1,221 @@
+"""Per-view request metrics, kept in memory and exported in Prometheus text format.
+
+``RequestMetricsMiddleware`` measures every request that resolved to a URL
+name: wall time, number and total time of SQL queries, template render time
+and response size. Values go into fixed-bucket histograms labelled by view
+name; ``render()`` produces the text served by the staff-only ``metrics``
+view. Requests slower than ``settings.SLOW_REQUEST_SECONDS`` are logged
+together with their most expensive SQL.
+
+Metrics live in the memory of each worker process, so a scraper sees the
+process that answered it.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_lock = threading.Lock()
+# Measurements of the request being handled in this thread or task
+_current = ContextVar('request_metrics', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}  # view -> [per-bucket counts (last is +Inf), sum]
+
+    def observe(self, view, value):
+        index = bisect_left(self.buckets, value)
+        with _lock:
+            counts, total = self.series.get(view) or ([0] * (len(self.buckets) + 1), 0)
+            counts[index] += 1
+            self.series[view] = [counts, total + value]
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with _lock:
+            series = sorted((view, list(counts), total) for view, (counts, total) in self.series.items())
+        for view, counts, total in series:
+            label = f'view="{_escape(view)}"'
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label}}} {total:g}')
+            lines.append(f'{self.name}_count{{{label}}} {cumulative}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.values = {}  # (view, status) -> count
+
+    def inc(self, view, status):
+        with _lock:
+            self.values[(view, status)] = self.values.get((view, status), 0) + 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with _lock:
+            values = sorted(self.values.items())
+        for (view, status), count in values:
+            lines.append(f'{self.name}{{view="{_escape(view)}",status="{status}"}} {count}')
+        return lines
+
+
+REQUESTS = Counter('http_requests_total', 'Requests by view and status code.')
+DURATION = Histogram('http_request_duration_seconds', 'Wall time spent handling the request.', DURATION_BUCKETS)
+DB_QUERIES = Histogram('http_db_queries', 'SQL queries run per request.', QUERY_COUNT_BUCKETS)
+DB_TIME = Histogram('http_db_query_duration_seconds', 'Time spent in SQL per request.', DURATION_BUCKETS)
+TEMPLATE_TIME = Histogram('http_template_render_seconds', 'Time spent rendering templates per request.', DURATION_BUCKETS)
+RESPONSE_SIZE = Histogram('http_response_size_bytes', 'Size of non-streaming response bodies.', SIZE_BUCKETS)
+METRICS = [REQUESTS, DURATION, DB_QUERIES, DB_TIME, TEMPLATE_TIME, RESPONSE_SIZE]
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    return '\n'.join(line for metric in METRICS for line in metric.render()) + '\n'
+
+
+def reset():
+    with _lock:
+        for metric in METRICS:
+            (metric.values if isinstance(metric, Counter) else metric.series).clear()
+
+
+class RequestMeasurement:
+    def __init__(self):
+        self.queries = []  # (sql, seconds)
+        self.template_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper timing every query of the request."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+
+def _wrap_connections(measurement):
+    """Install the query timer on this thread's connections; close the stack to remove it."""
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(measurement))
+    return stack
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        measurement = RequestMeasurement()
+        token = _current.set(measurement)
+        started = time.perf_counter()
+        try:
+            with _wrap_connections(measurement):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, measurement, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        measurement = RequestMeasurement()
+        token = _current.set(measurement)
+        started = time.perf_counter()
+        # Connections are per thread: the ORM runs this request's queries in
+        # its sync_to_async thread, so the timer is installed there.
+        stack = await sync_to_async(_wrap_connections)(measurement)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current.reset(token)
+        self.finish(request, response, measurement, time.perf_counter() - started)
+        return response
+
+    def finish(self, request, response, measurement, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        if match is not None and match.view_name:
+            self.record(request, match.view_name, response, measurement, elapsed)
+
+    def record(self, request, view, response, measurement, elapsed):
+        db_seconds = sum(seconds for _, seconds in measurement.queries)
+        REQUESTS.inc(view, response.status_code)
+        DURATION.observe(view, elapsed)
+        DB_QUERIES.observe(view, len(measurement.queries))
+        DB_TIME.observe(view, db_seconds)
+        TEMPLATE_TIME.observe(view, measurement.template_seconds)
+        if not response.streaming:
+            RESPONSE_SIZE.observe(view, len(response.content))
+
+        if elapsed >= settings.SLOW_REQUEST_SECONDS:
+            slowest = sorted(measurement.queries, key=lambda query: query[1], reverse=True)
+            logger.warning(
+                'Slow request %s %s (%s): %.3fs, %d queries in %.3fs, templates %.3fs%s',
+                request.method, request.get_full_path(), view, elapsed,
+                len(measurement.queries), db_seconds, measurement.template_seconds,
+                ''.join(f'\n  {seconds:.4f}s {sql}' for sql, seconds in slowest[:settings.SLOW_REQUEST_SQL_LIMIT]),
+            )
+
+
+# --- Template render timing ---
+class TimedTemplate:
+    """Wraps a backend template so top-level renders are charged to the request."""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        measurement = _current.get()
+        if measurement is None:
+            return self.template.render(context, request)
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            measurement.template_seconds += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """The Django template backend with render time recorded by the metrics middleware."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
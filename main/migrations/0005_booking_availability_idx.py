@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_remove_apartment_video_apartment_video_url'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['room', 'confirmed', 'check_in', 'check_out'], name='booking_availability_idx'),
+        ),
+    ]
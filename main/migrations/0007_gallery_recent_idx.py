@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gallery',
+            index=models.Index(fields=['-uploaded_at', '-id'], name='gallery_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_room_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('bookings_created', models.PositiveIntegerField(default=0)),
+                ('bookings_confirmed', models.PositiveIntegerField(default=0, help_text='Bookings created this day that are confirmed')),
+                ('nights_booked', models.PositiveIntegerField(default=0, help_text='Confirmed nights stayed on this day')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='main.room')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='rollup_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('room', 'day'), name='unique_rollup_room_day')],
+            },
+        ),
+    ]
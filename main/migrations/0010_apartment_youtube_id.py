@@ -0,0 +1,45 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:23
+
+import re
+
+from django.db import migrations, models
+
+# main.models.parse_youtube_id as of this migration
+YOUTUBE_ID_PATTERNS = [
+    re.compile(r'(?:youtube\.com\/watch\?v=|youtu\.be\/)([\w-]+)'),
+    re.compile(r'youtube\.com\/embed\/([\w-]+)'),
+    re.compile(r'youtube\.com\/v\/([\w-]+)'),
+]
+YOUTUBE_ID_MAX_LENGTH = 64
+
+
+def parse_youtube_id(url):
+    for pattern in YOUTUBE_ID_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1) if len(match.group(1)) <= YOUTUBE_ID_MAX_LENGTH else None
+    return None
+
+
+def backfill_youtube_id(apps, schema_editor):
+    Apartment = apps.get_model('main', 'Apartment')
+    apartments = list(Apartment.objects.exclude(video_url__isnull=True).exclude(video_url=''))
+    for apartment in apartments:
+        apartment.youtube_id = parse_youtube_id(apartment.video_url) or ''
+    Apartment.objects.bulk_update(apartments, ['youtube_id'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_bookingdailyrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apartment',
+            name='youtube_id',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=64),
+        ),
+        migrations.RunPython(backfill_youtube_id, migrations.RunPython.noop),
+    ]
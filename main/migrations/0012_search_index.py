@@ -0,0 +1,62 @@
+from django.db import migrations
+
+# The search index as main.search defined it at this migration; kept here so
+# later changes to that module cannot change what this migration does.
+TABLE = 'search_index'
+ROWID_STRIDE = 4
+
+# model -> (title fields, body fields, rowid code)
+SOURCES = {
+    'Room': (['title'], ['description'], 1),
+    'Apartment': (['name'], ['description'], 2),
+    'ContactMessage': (['name', 'email'], ['message'], 3),
+}
+
+
+def fts5_supported(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any(option == 'ENABLE_FTS5' for option, in cursor.fetchall())
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if not fts5_supported(connection):
+        # Other databases search through the in-memory index instead
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+            f"title, body, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        for model_name, (title_fields, body_fields, code) in SOURCES.items():
+            rows = apps.get_model('main', model_name).objects.values('pk', *title_fields, *body_fields)
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (rowid, title, body) VALUES (%s, %s, %s)',
+                [
+                    (
+                        row['pk'] * ROWID_STRIDE + code,
+                        ' '.join(str(row[field] or '') for field in title_fields),
+                        ' '.join(str(row[field] or '') for field in body_fields),
+                    )
+                    for row in rows.iterator(chunk_size=2000)
+                ],
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_admin_changelist_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-17 22:16
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='booking_name_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='booking_email_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='booking_phone_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='contactmessage',
+            name='contact_name_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='contactmessage',
+            name='contact_email_idx',
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 import re
 
 # --- Room model ---
@@ -15,6 +16,14 @@ class Room(models.Model):
     image = models.ImageField(upload_to='rooms/')
     is_featured = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Rooms listing: filter by type and price, default featured-first order
+            models.Index(fields=['room_type', 'price'], name='room_type_price_idx'),
+            models.Index(fields=['price'], name='room_price_idx'),
+            models.Index(fields=['-is_featured', 'price'], name='room_featured_price_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -25,11 +34,27 @@ class Gallery(models.Model):
     image = models.ImageField(upload_to='gallery/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Newest-first keyset pagination of the public gallery
+            models.Index(fields=['-uploaded_at', '-id'], name='gallery_recent_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
 
 # --- Booking model ---
+# Room prices are per month; a stay is billed per whole month, minimum one
+BILLING_PERIOD_NIGHTS = 30
+
+
+class BookingQuerySet(models.QuerySet):
+    def with_room(self):
+        """Join the room so rendering ``booking.room`` costs no extra query."""
+        return self.select_related('room')
+
+
 class Booking(models.Model):
     room = models.ForeignKey(Room, on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
@@ -41,9 +66,52 @@ class Booking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     confirmed = models.BooleanField(default=False)
 
+    objects = BookingQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Backs the overlap lookups done for availability checks
+            models.Index(fields=['room', 'confirmed', 'check_in', 'check_out'], name='booking_availability_idx'),
+            # Admin changelist: date filters and newest-first ordering
+            models.Index(fields=['check_in'], name='booking_check_in_idx'),
+            models.Index(fields=['check_out'], name='booking_check_out_idx'),
+            models.Index(fields=['-created_at'], name='booking_created_idx'),
+            models.Index(fields=['confirmed', '-created_at'], name='booking_confirmed_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.room.title}"
 
+    @property
+    def nights(self):
+        return (self.check_out - self.check_in).days
+
+    def estimated_cost(self):
+        """Room price times whole months stayed, minimum one month."""
+        return self.room.price * max(1, self.nights // BILLING_PERIOD_NIGHTS)
+
+
+# --- Booking daily rollup model ---
+class BookingDailyRollup(models.Model):
+    """Per room, per day booking totals kept up to date by main.reports."""
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='daily_rollups')
+    day = models.DateField()
+    bookings_created = models.PositiveIntegerField(default=0)
+    bookings_confirmed = models.PositiveIntegerField(default=0, help_text="Bookings created this day that are confirmed")
+    nights_booked = models.PositiveIntegerField(default=0, help_text="Confirmed nights stayed on this day")
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'day'], name='unique_rollup_room_day'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='rollup_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.room_id} @ {self.day}"
+
 
 # --- Contact Message model ---
 class ContactMessage(models.Model):
@@ -52,35 +120,94 @@ class ContactMessage(models.Model):
     message = models.TextField()
     sent_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Admin changelist: newest-first ordering and date filter
+            models.Index(fields=['-sent_at'], name='contact_sent_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
 
+# --- Outgoing Email model ---
+class OutgoingEmail(models.Model):
+    """Mail queued by the views and delivered by the send_queued_mail command."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.TextField(help_text="Comma-separated recipient addresses")
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outgoingemail_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to}"
+
+    def recipients(self):
+        return [address.strip() for address in self.to.split(',') if address.strip()]
+
+
 # --- Apartment model ---
+# YouTube URL formats we accept: watch?v=ID, youtu.be/ID, embed/ID and v/ID.
+# The ID ends at the first character that cannot be part of one, e.g. the
+# ?, & or # that starts a ?si= share tail.
+YOUTUBE_ID_PATTERNS = [
+    re.compile(r'(?:youtube\.com\/watch\?v=|youtu\.be\/)([\w-]+)'),
+    re.compile(r'youtube\.com\/embed\/([\w-]+)'),
+    re.compile(r'youtube\.com\/v\/([\w-]+)'),
+]
+YOUTUBE_ID_MAX_LENGTH = 64
+
+
+def parse_youtube_id(url):
+    """Extract the YouTube video ID from a URL, or None"""
+    if url:
+        for pattern in YOUTUBE_ID_PATTERNS:
+            match = pattern.search(url)
+            if match:
+                video_id = match.group(1)
+                return video_id if len(video_id) <= YOUTUBE_ID_MAX_LENGTH else None
+    return None
+
+
 class Apartment(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField()
     photo = models.ImageField(upload_to='apartments/photos/')
     video_url = models.URLField(blank=True, null=True, help_text="Enter YouTube video URL (e.g., https://www.youtube.com/watch?v=VIDEO_ID)")
+    # Parsed from video_url on save so pages never run the regexes
+    youtube_id = models.CharField(max_length=YOUTUBE_ID_MAX_LENGTH, blank=True, default='', db_index=True, editable=False)
 
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        self.youtube_id = parse_youtube_id(self.video_url) or ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'video_url' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'youtube_id'}
+        super().save(*args, **kwargs)
+    
     def get_youtube_id(self):
-        """Extract YouTube video ID from URL"""
-        if self.video_url:
-            # Extract ID from various YouTube URL formats
-            patterns = [
-                r'(?:youtube\.com\/watch\?v=|youtu\.be\/)([^&]+)',
-                r'youtube\.com\/embed\/([^?]+)',
-                r'youtube\.com\/v\/([^?]+)'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, self.video_url)
-                if match:
-                    return match.group(1)
-        return None
+        """Stored YouTube video ID, or None"""
+        return self.youtube_id or None
     
     def has_video(self):
-        return bool(self.video_url and self.get_youtube_id())
\ No newline at end of file
+        return bool(self.youtube_id)
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""Database-backed mail outbox.
+
+Views call ``enqueue()`` so a form POST never waits on SMTP; the
+``send_queued_mail`` management command drains the queue with ``send_due()``
+over one reused connection per batch, retrying failures with exponential
+backoff.  Run a single worker: rows are not locked while they are sent.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(subject, body, recipients, from_email=None):
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=', '.join(recipients),
+    )
+
+
+async def aenqueue(subject, body, recipients, from_email=None):
+    """``enqueue()`` for async views, through the async ORM."""
+    return await OutgoingEmail.objects.acreate(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=', '.join(recipients),
+    )
+
+
+def enqueue_many(messages):
+    """Queue (subject, body, recipients) tuples with a single INSERT per batch."""
+    return OutgoingEmail.objects.bulk_create(
+        [
+            OutgoingEmail(
+                subject=subject,
+                body=body,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=', '.join(recipients),
+            )
+            for subject, body, recipients in messages
+        ],
+        batch_size=500,
+    )
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+
+def _failed(email, exc):
+    """Record a failed attempt: back off, or give up after OUTBOX_MAX_ATTEMPTS."""
+    email.attempts += 1
+    email.last_error = str(exc)
+    if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        email.status = OutgoingEmail.FAILED
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+
+
+def send_due(batch_size=None, connection=None):
+    """Send one batch of due messages. Returns (sent, failed) counts."""
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    now = timezone.now()
+    batch = list(
+        OutgoingEmail.objects
+        .filter(status=OutgoingEmail.PENDING, next_attempt_at__lte=now)
+        .order_by('next_attempt_at', 'id')[:batch_size]
+    )
+    if not batch:
+        return 0, 0
+
+    sent = failed = 0
+    connection = connection or get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        # The server is unreachable: every message in the batch backs off
+        logger.warning('Opening the mail connection failed: %s', exc)
+        for email in batch:
+            _failed(email, exc)
+        failed = len(batch)
+    else:
+        try:
+            for email in batch:
+                try:
+                    EmailMessage(
+                        email.subject, email.body, email.from_email, email.recipients(),
+                        connection=connection,
+                    ).send()
+                except Exception as exc:
+                    failed += 1
+                    _failed(email, exc)
+                    logger.warning('Sending outgoing email #%s failed: %s', email.pk, exc)
+                else:
+                    sent += 1
+                    email.attempts += 1
+                    email.status = OutgoingEmail.SENT
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+        finally:
+            try:
+                connection.close()
+            except Exception as exc:
+                logger.warning('Closing the mail connection failed: %s', exc)
+
+    OutgoingEmail.objects.bulk_update(
+        batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'],
+    )
+    return sent, failed
@@ -0,0 +1,111 @@
+"""Pagination that stays cheap on large tables.
+
+Keyset (seek) pagination for newest-first listings: pages are addressed by
+an opaque cursor holding the (timestamp, id) of the last row already shown,
+so fetching page N costs the same as page 1.
+
+``EstimatedCountPaginator`` for the admin changelists: an unfiltered list of
+a large table takes its row count from the database statistics instead of
+running ``COUNT(*)`` over every row.  InnoDB keeps its statistics current;
+SQLite only has them after ``ANALYZE``, which the ``analyze_database``
+command runs (schedule it, e.g. nightly).  Until then the count stays exact.
+"""
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(timestamp, pk):
+    raw = f'{timestamp.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, pk = raw.split('|')
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def keyset_page(queryset, field, size, cursor=None):
+    """Return (rows, next_cursor) ordered by ``field`` then id, newest first.
+
+    ``next_cursor`` is None on the last page.
+    """
+    queryset = queryset.order_by(f'-{field}', '-id')
+    if cursor:
+        timestamp, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'id__lt': pk}))
+    rows = list(queryset[:size + 1])
+    if len(rows) <= size:
+        return rows, None
+    rows = rows[:size]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, field), last.pk)
+
+
+# Table row counts kept by each backend's statistics, given the table name
+ESTIMATE_QUERIES = {
+    'mysql': 'SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+    # Filled in by ANALYZE; the first number of an index's stat is the table's row count
+    'sqlite': 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s ORDER BY idx IS NULL LIMIT 1',
+}
+
+
+def refresh_statistics(using='default'):
+    """Re-gather the planner statistics that estimated_count() reads."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('ANALYZE')
+        elif connection.vendor == 'mysql':
+            tables = connection.introspection.django_table_names(only_existing=True)
+            cursor.execute('ANALYZE TABLE ' + ', '.join(connection.ops.quote_name(table) for table in tables))
+            cursor.fetchall()
+
+
+def estimated_count(model, using='default'):
+    """The planner's row count for ``model``'s table, or None when unknown."""
+    connection = connections[using]
+    sql = ESTIMATE_QUERIES.get(connection.vendor)
+    if sql is None:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [model._meta.db_table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        # e.g. sqlite_stat1 does not exist until ANALYZE has run
+        return None
+    if row is None or row[0] is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator using estimated_count() for unfiltered querysets of large tables.
+
+    Below ``settings.ADMIN_ESTIMATED_COUNT_THRESHOLD`` rows, and for any
+    filtered or searched list, the count stays exact.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if hasattr(queryset, 'query') and not queryset.query.where and not queryset.query.is_sliced:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
@@ -0,0 +1,160 @@
+"""Booking reports answered from pre-aggregated daily rollups.
+
+``BookingDailyRollup`` holds, per room and day, the bookings created that
+day and the confirmed nights and revenue falling on it.  Saving or deleting
+a booking refreshes only the (room, day) rows it touches; the
+``rebuild_booking_rollups`` command rebuilds any range from scratch.
+Revenue is the booking's estimated cost spread over its nights in whole
+cents, the remainder falling on the last night, so the days of a stay add up
+to exactly its cost.
+"""
+import calendar
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+
+from .models import Booking, BookingDailyRollup, Room
+
+CENT = Decimal('0.01')
+
+
+def nightly_revenue(booking):
+    """The booking's estimated cost split into one amount per night, summing to it exactly."""
+    cents = int(booking.estimated_cost() / CENT)
+    share, remainder = divmod(cents, booking.nights)
+    amounts = [share * CENT] * booking.nights
+    amounts[-1] += remainder * CENT
+    return amounts
+
+
+def refresh_rollups(room_id, start, end):
+    """Recompute the rollup rows of one room for every day in [start, end].
+
+    The totals are read and written in one transaction holding the room's
+    row lock (the one ``bookings.lock_room`` takes), so two refreshes of the
+    same room cannot interleave and both insert the same (room, day) row.
+    """
+    with transaction.atomic():
+        Room.objects.select_for_update().filter(pk=room_id).values_list('pk', flat=True).first()
+        rows = _rollup_rows(room_id, start, end)
+        BookingDailyRollup.objects.filter(room_id=room_id, day__range=(start, end)).delete()
+        BookingDailyRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def _rollup_rows(room_id, start, end):
+    totals = defaultdict(lambda: {'bookings_created': 0, 'bookings_confirmed': 0, 'nights_booked': 0, 'revenue': Decimal(0)})
+
+    created = (
+        Booking.objects
+        .filter(room_id=room_id, created_at__date__range=(start, end))
+        .annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(created=Count('id'), confirmed=Count('id', filter=Q(confirmed=True)))
+        .order_by()
+    )
+    for row in created:
+        totals[row['day']]['bookings_created'] = row['created']
+        totals[row['day']]['bookings_confirmed'] = row['confirmed']
+
+    stays = (
+        Booking.objects
+        .filter(room_id=room_id, confirmed=True, check_in__lte=end, check_out__gt=start)
+        .with_room()
+        .only('check_in', 'check_out', 'room__price')
+    )
+    for booking in stays:
+        if booking.nights <= 0:
+            continue
+        for night, amount in enumerate(nightly_revenue(booking)):
+            day = booking.check_in + timedelta(days=night)
+            if start <= day <= end:
+                totals[day]['nights_booked'] += 1
+                totals[day]['revenue'] += amount
+
+    return [
+        BookingDailyRollup(room_id=room_id, day=day, **{**values, 'revenue': values['revenue'].quantize(CENT)})
+        for day, values in totals.items()
+    ]
+
+
+def booking_span(booking):
+    """(room_id, first day, last day) of the rollup rows a booking contributes to."""
+    created = booking.created_at.date()
+    last_night = booking.check_out - timedelta(days=1)
+    return booking.room_id, min(created, booking.check_in), max(created, last_night)
+
+
+def refresh_for_bookings(queryset):
+    """Refresh the rollups touched by many bookings, one range per room."""
+    spans = (
+        queryset.values('room_id')
+        .annotate(first_in=Min('check_in'), last_out=Max('check_out'),
+                  first_created=Min('created_at'), last_created=Max('created_at'))
+        .order_by()
+    )
+    for span in spans:
+        start = min(span['first_in'], span['first_created'].date())
+        end = max(span['last_out'] - timedelta(days=1), span['last_created'].date())
+        refresh_rollups(span['room_id'], start, end)
+
+
+def rebuild(start=None, end=None):
+    """Rebuild every room's rollups, over all bookings unless a range is given."""
+    bounds = Booking.objects.aggregate(
+        first_in=Min('check_in'), last_out=Max('check_out'),
+        first_created=Min('created_at'), last_created=Max('created_at'),
+    )
+    if bounds['first_in'] is None:
+        BookingDailyRollup.objects.all().delete()
+        return 0
+    start = start or min(bounds['first_in'], bounds['first_created'].date())
+    end = end or max(bounds['last_out'], bounds['last_created'].date())
+    return sum(refresh_rollups(room_id, start, end) for room_id in Room.objects.values_list('id', flat=True))
+
+
+# --- Queries used by the booking report ---
+def totals(start=None):
+    rollups = BookingDailyRollup.objects.all()
+    if start:
+        rollups = rollups.filter(day__gte=start)
+    result = rollups.aggregate(
+        created=Sum('bookings_created', default=0),
+        confirmed=Sum('bookings_confirmed', default=0),
+    )
+    return result
+
+
+def monthly(start, end):
+    """Occupancy rate and revenue per month between two dates."""
+    room_count = Room.objects.count()
+    rows = (
+        BookingDailyRollup.objects
+        .filter(day__range=(start, end))
+        .annotate(month=TruncMonth('day'))
+        .values('month')
+        .annotate(
+            nights=Sum('nights_booked'),
+            revenue=Sum('revenue'),
+            created=Sum('bookings_created'),
+            confirmed=Sum('bookings_confirmed'),
+        )
+        .order_by('month')
+    )
+    months = []
+    for row in rows:
+        days = calendar.monthrange(row['month'].year, row['month'].month)[1]
+        available = room_count * days
+        months.append({
+            'month': row['month'].strftime('%Y-%m'),
+            'bookings_created': row['created'],
+            'bookings_confirmed': row['confirmed'],
+            'nights_booked': row['nights'],
+            'occupancy_rate': round(row['nights'] / available, 4) if available else 0,
+            'revenue': row['revenue'],
+        })
+    return months
@@ -0,0 +1,314 @@
+"""Full-text search over rooms, apartments and contact messages.
+
+Every object becomes one document with a title and a body (``SOURCES``).
+On SQLite with FTS5 the documents live in the ``search_index`` virtual table
+created by migration 0012, and matches are ranked by ``bm25()``.  The rowid
+encodes the object, ``pk * ROWID_STRIDE + kind code``, so an update touches
+a single row.
+
+Where FTS5 is not available (MySQL, or an SQLite build without it), each
+process keeps one ``InvertedIndex`` per kind in memory instead.  An index is
+built from the database the first time a query asks for its kind and rebuilt
+whenever that kind's ``search:<kind>`` version changes, the same way as the
+availability schedules; a site search therefore never loads the messages.
+
+Queries are split into words and every word must match, as a prefix, in
+either the title or the body.  Title matches weigh ``TITLE_WEIGHT`` times
+more.  The signal handlers in ``main.signals`` keep both backends current.
+Code that writes through ``bulk_create()`` or ``update()`` calls
+``rebuild()`` or the ``rebuild_search_index`` command.
+"""
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.expressions import RawSQL
+
+from .caching import bump_version, get_version
+from .models import Apartment, ContactMessage, Room
+
+# kind -> (model, title fields, body fields, rowid code)
+SOURCES = {
+    'room': (Room, ['title'], ['description'], 1),
+    'apartment': (Apartment, ['name'], ['description'], 2),
+    'message': (ContactMessage, ['name', 'email'], ['message'], 3),
+}
+KINDS = {model: kind for kind, (model, _, _, _) in SOURCES.items()}
+CODES = {code: kind for kind, (_, _, _, code) in SOURCES.items()}
+ROWID_STRIDE = 4
+
+TABLE = 'search_index'
+TITLE_WEIGHT = 10.0
+MAX_QUERY_TERMS = 8
+VERSION_NAMES = {kind: f'search:{kind}' for kind in SOURCES}
+
+# BM25 parameters, the same defaults FTS5 uses
+K1 = 1.2
+B = 0.75
+
+_word = re.compile(r'[^\W_]+')
+
+
+def tokens(text):
+    """Lower-cased words with accents removed, as FTS5's unicode61 tokenizer splits them."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _word.findall(text.lower())
+
+
+def query_terms(query):
+    """The distinct words of a user query, at most MAX_QUERY_TERMS of them."""
+    return list(dict.fromkeys(tokens(query)))[:MAX_QUERY_TERMS]
+
+
+def document(kind, values):
+    """(title, body) text of one object from a {field: value} mapping."""
+    _, title_fields, body_fields, _ = SOURCES[kind]
+    return (
+        ' '.join(str(values[field] or '') for field in title_fields),
+        ' '.join(str(values[field] or '') for field in body_fields),
+    )
+
+
+def documents(kind):
+    """Yield (pk, title, body) for every object of ``kind``."""
+    model, title_fields, body_fields, _ = SOURCES[kind]
+    fields = title_fields + body_fields
+    for row in model.objects.values('pk', *fields).iterator(chunk_size=2000):
+        yield (row['pk'], *document(kind, row))
+
+
+# --- SQLite FTS5 (the table is created by migration 0012) ---
+_fts_databases = {}
+
+
+def uses_fts(using=DEFAULT_DB_ALIAS):
+    """Whether the database has the FTS5 table, checked once per database file."""
+    connection = connections[using]
+    name = connection.settings_dict['NAME']
+    if name not in _fts_databases:
+        _fts_databases[name] = (
+            connection.vendor == 'sqlite' and TABLE in connection.introspection.table_names()
+        )
+    return _fts_databases[name]
+
+
+def _rowid(kind, pk):
+    return pk * ROWID_STRIDE + SOURCES[kind][3]
+
+
+def fts_fill(connection):
+    """Replace the FTS5 table's contents with every object's document."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        for kind in SOURCES:
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (rowid, title, body) VALUES (%s, %s, %s)',
+                [(_rowid(kind, pk), title, body) for pk, title, body in documents(kind)],
+            )
+
+
+def _fts_match(terms):
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _fts_search(connection, terms, kinds, limit):
+    match = _fts_match(terms)
+    codes = [SOURCES[kind][3] for kind in kinds]
+    placeholders = ', '.join(['%s'] * len(codes))
+    sql = (
+        f'SELECT rowid, bm25({TABLE}, %s, 1.0) AS score FROM {TABLE} '
+        f'WHERE {TABLE} MATCH %s AND rowid %% {ROWID_STRIDE} IN ({placeholders}) '
+        f'ORDER BY score'
+    )
+    params = [TITLE_WEIGHT, match, *codes]
+    if limit is not None:
+        sql += ' LIMIT %s'
+        params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        # bm25() is negative, lower being better
+        return [(CODES[rowid % ROWID_STRIDE], rowid // ROWID_STRIDE, -score) for rowid, score in cursor.fetchall()]
+
+
+# --- In-memory inverted index ---
+class InvertedIndex:
+    """Term -> postings map over weighted term frequencies, scored with BM25.
+
+    Terms are also kept sorted so a prefix is found by bisection rather than
+    by scanning the vocabulary.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(dict)  # term -> {(kind, pk): weighted frequency}
+        self.lengths = {}  # (kind, pk) -> weighted document length
+        self.terms = {}  # (kind, pk) -> terms of the document, for removal
+        self.total_length = 0.0
+        self._vocabulary = None
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, kind, pk, title, body):
+        key = (kind, pk)
+        self.remove(kind, pk)
+        frequencies = defaultdict(float)
+        for term in tokens(title):
+            frequencies[term] += TITLE_WEIGHT
+        for term in tokens(body):
+            frequencies[term] += 1.0
+        for term, frequency in frequencies.items():
+            if term not in self.postings:
+                self._vocabulary = None
+            self.postings[term][key] = frequency
+        self.terms[key] = list(frequencies)
+        self.lengths[key] = sum(frequencies.values())
+        self.total_length += self.lengths[key]
+
+    def remove(self, kind, pk):
+        key = (kind, pk)
+        if key not in self.lengths:
+            return
+        for term in self.terms.pop(key):
+            postings = self.postings[term]
+            postings.pop(key, None)
+            if not postings:
+                del self.postings[term]
+                self._vocabulary = None
+        self.total_length -= self.lengths.pop(key)
+
+    def expand(self, prefix):
+        """Indexed terms starting with ``prefix``."""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        vocabulary = self._vocabulary
+        index = bisect_left(vocabulary, prefix)
+        while index < len(vocabulary) and vocabulary[index].startswith(prefix):
+            yield vocabulary[index]
+            index += 1
+
+    def search(self, terms, limit=None):
+        count = len(self.lengths)
+        if not count or not terms:
+            return []
+        average_length = self.total_length / count
+        scores = None
+        for prefix in terms:
+            term_scores = defaultdict(float)
+            for term in self.expand(prefix):
+                postings = self.postings[term]
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, frequency in postings.items():
+                    norm = K1 * (1 - B + B * self.lengths[key] / average_length)
+                    term_scores[key] += idf * frequency * (K1 + 1) / (frequency + norm)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {key: score + term_scores[key] for key, score in scores.items() if key in term_scores}
+            if not scores:
+                return []
+        hits = ((score, key) for key, score in scores.items())
+        ranked = heapq.nlargest(limit, hits) if limit is not None else sorted(hits, reverse=True)
+        return [(kind, pk, score) for score, (kind, pk) in ranked]
+
+
+_lock = threading.Lock()
+_memory = {}  # kind -> (version, InvertedIndex)
+
+
+def _memory_index(kind):
+    """This process's InvertedIndex of ``kind``, rebuilt when another process changed the data."""
+    version = get_version(VERSION_NAMES[kind])
+    with _lock:
+        loaded = _memory.get(kind)
+        if loaded and loaded[0] == version:
+            return loaded[1]
+    index = InvertedIndex()
+    for pk, title, body in documents(kind):
+        index.add(kind, pk, title, body)
+    with _lock:
+        _memory[kind] = (version, index)
+    return index
+
+
+def _memory_changed(kind, change):
+    """Apply ``change(index)`` to the index of ``kind`` here and tell other processes to rebuild it."""
+    name = VERSION_NAMES[kind]
+    bump_version(name)
+    with _lock:
+        if kind in _memory:
+            index = _memory[kind][1]
+            change(index)
+            _memory[kind] = (get_version(name), index)
+
+
+def _memory_search(terms, kinds, limit):
+    hits = [hit for kind in kinds for hit in _memory_index(kind).search(terms, limit)]
+    key = lambda hit: hit[2]
+    return heapq.nlargest(limit, hits, key=key) if limit is not None else sorted(hits, key=key, reverse=True)
+
+
+# --- Public API ---
+def index_object(instance, using=DEFAULT_DB_ALIAS):
+    """Add or refresh the document of a saved Room, Apartment or ContactMessage."""
+    kind = KINDS[type(instance)]
+    title, body = document(kind, {field: getattr(instance, field) for field in SOURCES[kind][1] + SOURCES[kind][2]})
+    if uses_fts(using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {TABLE} (rowid, title, body) VALUES (%s, %s, %s)',
+                [_rowid(kind, instance.pk), title, body],
+            )
+    else:
+        transaction.on_commit(lambda: _memory_changed(kind, lambda index: index.add(kind, instance.pk, title, body)), using)
+
+
+def remove_object(instance, using=DEFAULT_DB_ALIAS):
+    kind, pk = KINDS[type(instance)], instance.pk
+    if uses_fts(using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [_rowid(kind, pk)])
+    else:
+        transaction.on_commit(lambda: _memory_changed(kind, lambda index: index.remove(kind, pk)), using)
+
+
+def rebuild(using=DEFAULT_DB_ALIAS):
+    """Re-index every object, e.g. after writes that sent no signals."""
+    if uses_fts(using):
+        with transaction.atomic(using):
+            fts_fill(connections[using])
+    else:
+        bump_version(*VERSION_NAMES.values())
+
+
+def search(query, kinds=tuple(SOURCES), limit=20, using=DEFAULT_DB_ALIAS):
+    """Ranked [(kind, pk, score)] for ``query``, best first; score is higher for better matches."""
+    terms = query_terms(query)
+    if not terms or not kinds:
+        return []
+    if uses_fts(using):
+        return _fts_search(connections[using], terms, kinds, limit)
+    return _memory_search(terms, list(dict.fromkeys(kinds)), limit)
+
+
+def filter_queryset(queryset, query, using=DEFAULT_DB_ALIAS):
+    """``queryset`` narrowed to every object matching ``query``, unranked.
+
+    On FTS5 the matches stay in the database as a subquery; the in-memory
+    index hands over the set of matching primary keys.
+    """
+    kind = KINDS[queryset.model]
+    terms = query_terms(query)
+    if not terms:
+        return queryset
+    if uses_fts(using):
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid / {ROWID_STRIDE} FROM {TABLE} WHERE {TABLE} MATCH %s AND rowid %% {ROWID_STRIDE} = %s',
+            [_fts_match(terms), SOURCES[kind][3]],
+        ))
+    return queryset.filter(pk__in=[pk for _, pk, _ in _memory_index(kind).search(terms)])
@@ -0,0 +1,87 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import availability, images, reports, search
+from .caching import bump_version
+from .models import Apartment, Booking, ContactMessage, Gallery, Room
+
+
+def bookings_changed(*room_ids):
+    """Refresh everything derived from bookings of the given rooms.
+
+    Called from the signal handlers below and directly by code that writes
+    through ``QuerySet.update()``, which sends no signals.
+    """
+    availability.invalidate(*room_ids)
+    bump_version('booking')
+
+
+# --- Booking availability and report rollups ---
+@receiver(pre_save, sender=Booking)
+def remember_previous_state(sender, instance, **kwargs):
+    """Keep the stored version of an edited booking so old dates and room get refreshed too."""
+    instance._previous = None
+    if instance.pk:
+        instance._previous = (
+            Booking.objects.filter(pk=instance.pk)
+            .only('room_id', 'check_in', 'check_out', 'created_at')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def refresh_booking_data(sender, instance, **kwargs):
+    versions = [instance]
+    previous = getattr(instance, '_previous', None)
+    if previous is not None:
+        versions.append(previous)
+    spans = {reports.booking_span(booking) for booking in versions}
+
+    def refresh_rollups():
+        for span in spans:
+            reports.refresh_rollups(*span)
+
+    transaction.on_commit(lambda: bookings_changed(*{room_id for room_id, _, _ in spans}))
+    # The booking has committed: a failed rollup is logged, not turned into a
+    # 500 for the guest, and rebuild_booking_rollups repairs the report
+    transaction.on_commit(refresh_rollups, robust=True)
+
+
+# --- Page cache and site statistics ---
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=Gallery)
+@receiver(post_delete, sender=Gallery)
+@receiver(post_save, sender=Apartment)
+@receiver(post_delete, sender=Apartment)
+@receiver(post_save, sender=ContactMessage)
+@receiver(post_delete, sender=ContactMessage)
+def invalidate_model_version(sender, instance, **kwargs):
+    name = sender._meta.model_name
+    transaction.on_commit(lambda: bump_version(name))
+
+
+# --- Full-text search index ---
+@receiver(post_save, sender=Room)
+@receiver(post_save, sender=Apartment)
+@receiver(post_save, sender=ContactMessage)
+def index_for_search(sender, instance, using, **kwargs):
+    search.index_object(instance, using)
+
+
+@receiver(post_delete, sender=Room)
+@receiver(post_delete, sender=Apartment)
+@receiver(post_delete, sender=ContactMessage)
+def remove_from_search(sender, instance, using, **kwargs):
+    search.remove_object(instance, using)
+
+
+# --- Image derivatives ---
+@receiver(post_save, sender=Room)
+@receiver(post_save, sender=Gallery)
+@receiver(post_save, sender=Apartment)
+def create_image_derivatives(sender, instance, **kwargs):
+    field_name = dict(images.IMAGE_FIELDS)[sender._meta.label]
+    images.ensure_derivatives(getattr(instance, field_name))
@@ -0,0 +1,36 @@
+"""Site-wide counters shared by the public pages and the admin dashboard."""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .caching import get_versions
+from .models import Booking, ContactMessage, Room
+
+STATS_VERSIONS = ['room', 'booking', 'contactmessage']
+
+
+def _compute():
+    # One conditional aggregate per model
+    stats = {}
+    stats.update(Room.objects.aggregate(
+        total_rooms=Count('id'),
+        featured_rooms=Count('id', filter=Q(is_featured=True)),
+    ))
+    stats.update(Booking.objects.aggregate(
+        total_bookings=Count('id'),
+        confirmed_bookings=Count('id', filter=Q(confirmed=True)),
+    ))
+    stats.update(ContactMessage.objects.aggregate(total_messages=Count('id')))
+    stats['pending_bookings'] = stats['total_bookings'] - stats['confirmed_bookings']
+    return stats
+
+
+def site_stats():
+    """Return the counters, recomputing them only after a relevant model changed."""
+    versions = get_versions(STATS_VERSIONS)
+    key = 'site_stats:' + '.'.join(versions[name] for name in STATS_VERSIONS)
+    stats = cache.get(key)
+    if stats is None:
+        stats = _compute()
+        cache.set(key, stats, settings.PAGE_CACHE_TIMEOUT)
+    return stats
@@ -0,0 +1,34 @@
+"""Streaming responses that stay streamed under ASGI.
+
+Django's ASGI handler consumes a synchronous streaming iterator with
+``sync_to_async(list)``: the whole body is built in memory before the first
+byte goes out.  ``for_request()`` gives the responses of ASGI requests an
+asynchronous iterator instead, which pulls ``BATCH_SIZE`` parts at a time
+from the synchronous one in Django's sync thread, where the ORM may run.
+Under WSGI the response is left alone, so ``FileResponse`` keeps using the
+server's file wrapper.
+"""
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+BATCH_SIZE = 64
+
+
+def _next_batch(iterator, size):
+    return list(islice(iterator, size))
+
+
+async def _batches(iterator, size):
+    next_batch = sync_to_async(_next_batch)
+    while batch := await next_batch(iterator, size):
+        # One ASGI message per batch rather than per line or block
+        yield batch[0][:0].join(batch)
+
+
+def for_request(request, response, batch_size=BATCH_SIZE):
+    """``response``, streaming asynchronously when ``request`` came in over ASGI."""
+    if isinstance(request, ASGIRequest) and not response.is_async:
+        response.streaming_content = _batches(iter(response.streaming_content), batch_size)
+    return response
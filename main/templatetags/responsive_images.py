@@ -0,0 +1,31 @@
+from django import template
+from django.utils.html import format_html
+
+from .. import images
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_img(field_file, alt='', sizes='100vw', **attrs):
+    """Render a <picture> with WebP and original-format srcsets.
+
+    Usage: ``{% responsive_img room.image alt=room.title class="card-img-top" %}``.
+    Falls back to a plain <img> until derivatives have been generated.
+    """
+    extra = format_html(''.join(f' {key}="{{}}"' for key in attrs), *attrs.values())
+    if not images.has_derivatives(field_file):
+        return format_html('<img src="{}" alt="{}"{} loading="lazy">', field_file.url, alt, extra)
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}"{} loading="lazy">'
+        '</picture>',
+        images.srcset(field_file, 'webp'), sizes,
+        field_file.url, images.srcset(field_file), sizes, alt, extra,
+    )
+
+
+@register.filter
+def thumbnail_url(field_file):
+    return images.thumbnail_url(field_file)
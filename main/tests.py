@@ -1,3 +1,1151 @@
-from django.test import TestCase
+import base64
+import io
+import random
+import tempfile
+import threading
+import time
+import warnings
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, re_path
+from django.utils import timezone
+from PIL import Image
+
+from . import analytics, availability, bookings, catalog, images, imports, media, metrics, outbox, reports, search, stats, validation
+from .admin import admin_site
+from .assets import minify_css, minify_js
+from .forms import BookingForm
+from .pagination import EstimatedCountPaginator, InvalidCursor, decode_cursor, keyset_page
+from .models import (
+    Apartment, Booking, BookingDailyRollup, ContactMessage, Gallery, OutgoingEmail, Room, parse_youtube_id,
+)
+
+# The custom admin site is not routed by APARTMENT.urls; mount it for tests
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('custom-admin/', admin_site.urls),
+    re_path(r'^media/(?P<path>.*)$', media.serve),
+    path('', include('main.urls')),
+]
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    """Many threads racing for the same nights must never double-book a room."""
+
+    threads = 12
+    attempts_per_thread = 25
+
+    def setUp(self):
+        self.room = Room.objects.create(title='Stress room', room_type='double', price=50000, image='')
+        self.start = date.today() + timedelta(days=30)
+
+    def _random_booking(self, rng):
+        check_in = self.start + timedelta(days=rng.randrange(20))
+        return Booking(
+            room=self.room, name='Guest', email='guest@example.com', phone='0',
+            check_in=check_in, check_out=check_in + timedelta(days=rng.randint(1, 4)),
+        )
+
+    def _hammer(self, seed, errors):
+        rng = random.Random(seed)
+        try:
+            for _ in range(self.attempts_per_thread):
+                try:
+                    bookings.place_booking(self._random_booking(rng), confirm=True)
+                except bookings.BookingConflict:
+                    pass
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connections.close_all()
+
+    def assertNoOverlaps(self):
+        stays = sorted(
+            Booking.objects.filter(room=self.room, confirmed=True).values_list('check_in', 'check_out')
+        )
+        self.assertTrue(stays)
+        for (_, previous_out), (next_in, _) in zip(stays, stays[1:]):
+            self.assertLessEqual(previous_out, next_in)
+
+    def test_concurrent_place_booking_never_overlaps(self):
+        errors = []
+        workers = [threading.Thread(target=self._hammer, args=(seed, errors)) for seed in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        self.assertNoOverlaps()
+
+    def test_confirm_bookings_skips_conflicts(self):
+        first = Booking.objects.create(
+            room=self.room, name='A', email='a@example.com', phone='0',
+            check_in=self.start, check_out=self.start + timedelta(days=3),
+        )
+        second = Booking.objects.create(
+            room=self.room, name='B', email='b@example.com', phone='0',
+            check_in=self.start + timedelta(days=2), check_out=self.start + timedelta(days=5),
+        )
+
+        confirmed, conflicts = bookings.confirm_bookings(Booking.objects.all())
+
+        self.assertEqual(confirmed, [first])
+        self.assertEqual(conflicts, [second])
+        self.assertNoOverlaps()
+
+    def test_bulk_confirm_and_cancel_across_chunks(self):
+        stays = [(0, 3), (2, 5), (3, 6), (5, 8)]
+        for offset, end in stays:
+            Booking.objects.create(
+                room=self.room, name='Guest', email='guest@example.com', phone='0',
+                check_in=self.start + timedelta(days=offset), check_out=self.start + timedelta(days=end),
+            )
+
+        confirmed, conflicts = bookings.confirm_bookings(Booking.objects.all(), chunk_size=1)
+
+        self.assertEqual(len(confirmed), 2)
+        self.assertEqual(len(conflicts), 2)
+        self.assertNoOverlaps()
+        self.assertEqual(OutgoingEmail.objects.filter(subject__startswith='Booking Confirmed').count(), 2)
+
+        self.assertEqual(bookings.cancel_bookings(Booking.objects.all(), chunk_size=1), 2)
+        self.assertFalse(Booking.objects.filter(confirmed=True).exists())
+        self.assertEqual(OutgoingEmail.objects.filter(subject__startswith='Booking Cancelled').count(), 2)
+
+    def test_failed_chunk_leaves_earlier_chunks_complete(self):
+        for offset in (0, 10):
+            Booking.objects.create(
+                room=self.room, name='Guest', email='guest@example.com', phone='0',
+                check_in=self.start + timedelta(days=offset), check_out=self.start + timedelta(days=offset + 3),
+            )
+        self.assertTrue(availability.is_available(self.room.pk, self.start, self.start + timedelta(days=3)))
+        schedules = bookings.confirmed_schedules
+
+        def fail_second_chunk(candidates):
+            if Booking.objects.filter(confirmed=True).exists():
+                raise RuntimeError('worker stopped')
+            return schedules(candidates)
+
+        with mock.patch.object(bookings, 'confirmed_schedules', fail_second_chunk):
+            with self.assertRaises(RuntimeError):
+                bookings.confirm_bookings(Booking.objects.all(), chunk_size=1)
+
+        self.assertEqual(Booking.objects.filter(confirmed=True).count(), 1)
+        self.assertEqual(OutgoingEmail.objects.filter(subject__startswith='Booking Confirmed').count(), 1)
+        self.assertFalse(availability.is_available(self.room.pk, self.start, self.start + timedelta(days=3)))
+
+
+class QueryCountMixin:
+    """Assert that a page costs a fixed number of queries however many rows it shows."""
+
+    def assertQueryCount(self, url, expected, add_rows):
+        for _ in range(2):
+            cache.clear()
+            with self.assertNumQueries(expected):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            add_rows()
+
+
+@override_settings(ROOT_URLCONF='main.tests')
+class BookingQueryCountTests(QueryCountMixin, TestCase):
+
+    def setUp(self):
+        self.rooms = [
+            Room.objects.create(title=f'Room {n}', room_type='double', price=50000, image='')
+            for n in range(3)
+        ]
+        self.booking = self.add_bookings(1)[0]
+        staff = User.objects.create_user('staff', password='pw', is_staff=True, is_superuser=True)
+        self.client.force_login(staff)
+
+    def add_bookings(self, count=5):
+        check_in = date.today() + timedelta(days=10)
+        created = [
+            Booking.objects.create(
+                room=self.rooms[n % len(self.rooms)], name=f'Guest {n}', email='guest@example.com',
+                phone='0', check_in=check_in, check_out=check_in + timedelta(days=2),
+            )
+            for n in range(count)
+        ]
+        ContactMessage.objects.create(name='Guest', email='guest@example.com', message='Hello')
+        return created
+
+    def test_booking_success(self):
+        self.assertQueryCount(f'/booking/success/{self.booking.pk}/', 1, self.add_bookings)
+
+    def test_booking_report(self):
+        self.assertQueryCount('/reports/bookings/', 11, self.add_bookings)
+
+    def test_booking_changelist(self):
+        self.assertQueryCount('/admin/main/booking/', 8, self.add_bookings)
+
+    def test_booking_search_matches_substrings(self):
+        Booking.objects.create(
+            room=self.rooms[0], name='Ada Lovelace', email='ada@example.org', phone='+250788123456',
+            check_in=date.today(), check_out=date.today() + timedelta(days=1),
+        )
+        for term in ['lovelace', 'example.org', '788123']:
+            with self.subTest(term=term):
+                response = self.client.get('/admin/main/booking/', {'q': term})
+                self.assertEqual([booking.name for booking in response.context['cl'].result_list], ['Ada Lovelace'])
+
+    def test_dashboard(self):
+        self.assertQueryCount('/custom-admin/dashboard/', 9, self.add_bookings)
+
+
+class BookingImportTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.single = Room.objects.create(title='Single', room_type='single', price=50000, image='')
+        self.double = Room.objects.create(title='Double', room_type='double', price=80000, image='')
+        self.start = date.today() + timedelta(days=30)
+
+    def csv_rows(self, *rows):
+        lines = ['room,name,email,phone,check_in,check_out,guests,confirmed']
+        for room, check_in, check_out, guests in rows:
+            lines.append(f'{room},Guest,guest@example.com,0,{check_in},{check_out},{guests},yes')
+        return imports.read_rows(io.StringIO('\n'.join(lines) + '\n'), 'csv')
+
+    def day(self, offset):
+        return self.start + timedelta(days=offset)
+
+    def test_rows_are_validated_and_rejects_reported(self):
+        result = imports.import_bookings(self.csv_rows(
+            (self.double.pk, self.day(0), self.day(3), 2),
+            ('Single', self.day(0), self.day(2), 3),
+            (self.double.pk, date.today() - timedelta(days=1), self.day(1), 1),
+            (999, self.day(0), self.day(1), 1),
+            (self.single.pk, self.day(5), self.day(6), 100000000000000000000),
+            (self.double.pk, self.day(2), self.day(4), 2),
+        ))
+
+        self.assertEqual(result.imported, 1)
+        reasons = {number: errors for number, _, errors in result.rejected}
+        self.assertEqual(reasons[3], ['This single room can accommodate maximum 2 guests.'])
+        self.assertEqual(reasons[4], ['Check-in date cannot be in the past.'])
+        self.assertEqual(reasons[5], ['Unknown room'])
+        self.assertEqual(reasons[6], ['guests must be a positive whole number'])
+        self.assertEqual(reasons[7], ['Overlaps a confirmed booking earlier in this file'])
+
+        report = io.StringIO()
+        imports.write_rejects(result, report)
+        self.assertEqual(len(report.getvalue().splitlines()), 6)
+
+    def test_reject_report_neutralises_formulas(self):
+        result = imports.import_bookings(self.csv_rows(('=HYPERLINK("http://evil")', self.day(0), self.day(1), 1)))
+
+        report = io.StringIO()
+        imports.write_rejects(result, report)
+        self.assertIn('''"'=HYPERLINK(""http://evil"")"''', report.getvalue().splitlines()[1])
+
+    def test_failure_part_way_leaves_availability_fresh(self):
+        self.assertTrue(availability.is_available(self.double.pk, self.day(0), self.day(3)))
+        write_batch = imports._write_batch
+
+        def fail_second_batch(candidates, imported):
+            if imported.starts:
+                raise OperationalError('database is locked')
+            return write_batch(candidates, imported)
+
+        rows = self.csv_rows(
+            (self.double.pk, self.day(0), self.day(3), 2),
+            (self.single.pk, self.day(0), self.day(3), 1),
+        )
+        with mock.patch.object(imports, '_write_batch', fail_second_batch):
+            with self.assertRaises(OperationalError):
+                imports.import_bookings(rows, batch_size=1)
+
+        self.assertEqual(Booking.objects.filter(confirmed=True).count(), 1)
+        self.assertFalse(availability.is_available(self.double.pk, self.day(0), self.day(3)))
+
+
+class BookingRulesTests(SimpleTestCase):
+    today = date(2025, 6, 1)
+
+    def test_single_booking(self):
+        self.assertEqual(validation.booking_errors(self.today, self.today + timedelta(days=2), 'double', 4, self.today), {})
+        self.assertEqual(
+            validation.booking_errors(self.today - timedelta(days=1), self.today - timedelta(days=1), 'single', 3, self.today),
+            {
+                'check_in': validation.PAST_CHECK_IN,
+                'check_out': validation.CHECK_OUT_ORDER,
+                'guests': 'This single room can accommodate maximum 2 guests.',
+            },
+        )
+        self.assertEqual(validation.booking_errors(self.today - timedelta(days=1), self.today, 'double', 1, allow_past=True), {})
+        # Missing values skip the rules that need them
+        self.assertEqual(validation.booking_errors(None, self.today, None, 9, self.today), {})
+
+    def test_columns_agree_with_single_bookings(self):
+        rng = random.Random(0)
+        rows = []
+        for _ in range(500):
+            check_in = self.today + timedelta(days=rng.randint(-5, 5))
+            check_out = check_in + timedelta(days=rng.randint(-2, 3))
+            rows.append((
+                rng.choice([check_in, None]), check_out, rng.choice(['single', 'double', 'suite', '']), rng.randint(0, 6),
+            ))
+
+        checks = validation.validate_columns(*zip(*rows), today=self.today)
+
+        for index, row in enumerate(rows):
+            self.assertEqual(checks.errors(index), validation.booking_errors(*row, today=self.today))
+            self.assertEqual(bool(checks.valid[index]), not validation.booking_errors(*row, today=self.today))
+
+
+class BookingFormTests(TestCase):
+
+    def test_form_reports_every_broken_rule(self):
+        room = Room.objects.create(title='Single', room_type='single', price=50000, image='')
+        yesterday = date.today() - timedelta(days=1)
+        form = BookingForm({
+            'room': room.pk, 'name': 'Guest', 'email': 'guest@example.com', 'phone': '0',
+            'check_in': yesterday, 'check_out': yesterday, 'guests': 3,
+        })
+
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['check_in'], [validation.PAST_CHECK_IN])
+        self.assertEqual(form.errors['check_out'], [validation.CHECK_OUT_ORDER])
+        self.assertEqual(form.errors['guests'], ['This single room can accommodate maximum 2 guests.'])
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        outbox.enqueue_many([(f'Subject {n}', 'Body', ['guest@example.com']) for n in range(3)])
+
+    def test_sends_due_mail(self):
+        self.assertEqual(outbox.send_due(), (3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(OutgoingEmail.objects.filter(status=OutgoingEmail.SENT).count(), 3)
+        self.assertEqual(outbox.send_due(), (0, 0))
+
+    def test_unreachable_server_backs_the_batch_off(self):
+        connection = mail.get_connection()
+        with mock.patch.object(connection, 'open', side_effect=OSError('Connection refused')):
+            self.assertEqual(outbox.send_due(connection=connection), (0, 3))
+
+        for email in OutgoingEmail.objects.all():
+            self.assertEqual(email.status, OutgoingEmail.PENDING)
+            self.assertEqual(email.attempts, 1)
+            self.assertEqual(email.last_error, 'Connection refused')
+        # Not due again until the backoff has passed
+        self.assertEqual(outbox.send_due(), (0, 0))
+        self.assertEqual(mail.outbox, [])
+
+
+class EstimatedCountTests(TestCase):
+
+    def setUp(self):
+        for n in range(3):
+            ContactMessage.objects.create(name=f'Guest {n}', email='guest@example.com', message='Hello')
+        call_command('analyze_database', stdout=io.StringIO())
+        # Rows added since the statistics were gathered
+        for n in range(2):
+            ContactMessage.objects.create(name=f'Late {n}', email='late@example.com', message='Hello')
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1)
+    def test_large_unfiltered_list_is_estimated(self):
+        paginator = EstimatedCountPaginator(ContactMessage.objects.order_by('pk'), 2)
+        self.assertEqual(paginator.count, 3)
+        self.assertEqual(paginator.num_pages, 2)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1)
+    def test_filtered_list_is_counted(self):
+        queryset = ContactMessage.objects.filter(email='late@example.com')
+        self.assertEqual(EstimatedCountPaginator(queryset.order_by('pk'), 2).count, 2)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1)
+    def test_no_statistics_means_an_exact_count(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TABLE sqlite_stat1')
+        self.assertEqual(EstimatedCountPaginator(ContactMessage.objects.order_by('pk'), 2).count, 5)
+
+    def test_small_table_is_counted(self):
+        self.assertEqual(EstimatedCountPaginator(ContactMessage.objects.order_by('pk'), 2).count, 5)
+
+
+@override_settings(ROOT_URLCONF='main.tests')
+class ContactMessageAdminTests(TestCase):
+
+    def setUp(self):
+        staff = User.objects.create_user('staff', password='pw', is_staff=True, is_superuser=True)
+        self.client.force_login(staff)
+
+    def add_messages(self, count):
+        for n in range(count):
+            ContactMessage.objects.create(name=f'Guest {n}', email='guest@example.com', message='Long message ' * 20)
+
+    def test_changelist_shows_previews(self):
+        self.add_messages(2)
+        response = self.client.get('/admin/main/contactmessage/')
+        self.assertContains(response, 'Long message Long message Long message Long messag...')
+        self.assertNotContains(response, 'Long message ' * 5)
+
+    def test_export_action_reads_whole_messages_in_one_query(self):
+        for count in (2, 4):
+            self.add_messages(count)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post('/admin/main/contactmessage/', {
+                    'action': 'export_csv', 'index': 0,
+                    '_selected_action': list(ContactMessage.objects.values_list('pk', flat=True)),
+                })
+                lines = b''.join(response.streaming_content).decode().splitlines()
+            self.assertEqual(len(lines), ContactMessage.objects.count() + 1)
+            self.assertIn('Long message ' * 19, lines[1])
+            if count == 2:
+                expected = len(queries)
+        self.assertEqual(len(queries), expected)
+
+    def test_csv_export_neutralises_formulas(self):
+        ContactMessage.objects.create(name='=HYPERLINK("http://evil")', email='-1@example.com', message='@SUM(A1)')
+        response = self.client.post('/admin/main/contactmessage/', {
+            'action': 'export_csv', 'index': 0,
+            '_selected_action': list(ContactMessage.objects.values_list('pk', flat=True)),
+        })
+        row = b''.join(response.streaming_content).decode().splitlines()[1]
+        self.assertIn('''"'=HYPERLINK(""http://evil"")",'-1@example.com,'@SUM(A1),''', row)
+
+
+@override_settings(ROOT_URLCONF='main.tests')
+class AsgiStreamingTests(TestCase):
+    """Under ASGI, exports and media must stream rather than be read into memory first."""
+
+    def setUp(self):
+        staff = User.objects.create_user('staff', password='pw', is_staff=True, is_superuser=True)
+        self.async_client.force_login(staff)
+
+    async def get_streamed(self, url):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.is_async)
+            return [part async for part in response.streaming_content]
+
+    async def test_export_streams_in_batches(self):
+        await ContactMessage.objects.abulk_create(
+            ContactMessage(name=f'Guest {n}', email='guest@example.com', message='Hello') for n in range(150)
+        )
+        parts = await self.get_streamed('/reports/export/messages.csv')
+        self.assertGreater(len(parts), 1)
+        self.assertEqual(b''.join(parts).count(b'\r\n'), 151)
+
+    async def test_media_streams_in_batches(self):
+        content = bytes(range(256)) * 4096
+        with tempfile.TemporaryDirectory() as root, self.settings(MEDIA_ROOT=root):
+            with open(f'{root}/big.bin', 'wb') as file:
+                file.write(content)
+            parts = await self.get_streamed('/media/big.bin')
+        self.assertGreater(len(parts), 1)
+        self.assertEqual(b''.join(parts), content)
+
+
+@override_settings(ROOT_URLCONF='main.tests')
+class SearchTests(TestCase):
+    """Runs on the FTS5 table; InMemorySearchTests repeats it on the in-memory indexes."""
+
+    def setUp(self):
+        cache.clear()
+        self.garden = Room.objects.create(title='Garden suite', room_type='suite', price=90000, image='',
+                                          description='Quiet, with a view of the lake')
+        self.lake = Room.objects.create(title='Lake double', room_type='double', price=60000, image='',
+                                        description='Opens onto the garden')
+        self.apartment = Apartment.objects.create(name='Family apartment', photo='', description='A garden café')
+        self.message = ContactMessage.objects.create(name='Guest', email='guest@example.com',
+                                                     message='Is the garden open in winter?')
+
+    def commit(self, change):
+        with self.captureOnCommitCallbacks(execute=True):
+            return change()
+
+    def test_title_matches_rank_first(self):
+        hits = search.search('garden', kinds=['room'])
+        self.assertEqual([pk for _, pk, _ in hits], [self.garden.pk, self.lake.pk])
+        self.assertEqual([pk for _, pk, _ in search.search('GARD qui', kinds=['room'])], [self.garden.pk])
+        self.assertEqual({kind for kind, _, _ in search.search('garden')}, {'room', 'apartment', 'message'})
+        # Accents are ignored and every word must match
+        self.assertEqual(search.search('cafe', kinds=['apartment'])[0][1], self.apartment.pk)
+        self.assertEqual(search.search('garden winter', kinds=['room']), [])
+
+    def test_signals_keep_the_index_current(self):
+        self.lake.description = 'Opens onto the courtyard'
+        self.commit(self.lake.save)
+        self.assertEqual(search.search('courtyard', kinds=['room'])[0][1], self.lake.pk)
+        self.assertEqual([pk for _, pk, _ in search.search('garden', kinds=['room'])], [self.garden.pk])
+
+        self.commit(self.garden.delete)
+        self.assertEqual(search.search('garden', kinds=['room']), [])
+
+    def test_admin_search_is_not_truncated(self):
+        staff = User.objects.create_user('staff', password='pw', is_staff=True, is_superuser=True)
+        self.client.force_login(staff)
+        response = self.client.get('/admin/main/room/', {'q': 'garden'})
+        self.assertEqual(set(response.context['cl'].result_list), {self.garden, self.lake})
+        self.assertEqual(set(search.filter_queryset(ContactMessage.objects.all(), 'winter')), {self.message})
+        self.assertFalse(search.filter_queryset(Room.objects.all(), 'winter').exists())
+
+
+class InMemorySearchTests(SearchTests):
+
+    def setUp(self):
+        patcher = mock.patch.dict(search._fts_databases, {connection.settings_dict['NAME']: False})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        search._memory.clear()
+        self.addCleanup(search._memory.clear)
+        super().setUp()
+
+    def test_site_search_loads_only_the_kinds_it_shows(self):
+        response = self.client.get('/search/', {'q': 'garden'})
+        self.assertEqual([result['id'] for result in response.json()['results'] if result['type'] == 'room'],
+                         [self.garden.pk, self.lake.pk])
+        self.assertEqual(set(search._memory), {'room', 'apartment'})
+
+        # A new message neither loads nor invalidates the site search's indexes
+        rooms = search._memory['room']
+        self.commit(lambda: ContactMessage.objects.create(name='Guest', email='guest@example.com', message='Hi'))
+        self.assertEqual(set(search._memory), {'room', 'apartment'})
+        self.assertIs(search._memory_index('room'), rooms[1])
+
+
+class YoutubeIdTests(SimpleTestCase):
+
+    def test_accepted_formats(self):
+        for url in [
+            'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+            'https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=42s',
+            'https://youtu.be/dQw4w9WgXcQ?si=Ab12_cD',
+            'https://youtu.be/dQw4w9WgXcQ#t=10',
+            'https://www.youtube.com/embed/dQw4w9WgXcQ?autoplay=1',
+            'https://www.youtube.com/v/dQw4w9WgXcQ&hl=en',
+        ]:
+            with self.subTest(url=url):
+                self.assertEqual(parse_youtube_id(url), 'dQw4w9WgXcQ')
+
+    def test_rejected_urls(self):
+        for url in [None, '', 'https://vimeo.com/123', 'https://youtu.be/?si=x', 'https://youtu.be/' + 'a' * 65]:
+            with self.subTest(url=url):
+                self.assertIsNone(parse_youtube_id(url))
+
+
+class AvailabilityTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        availability.clear()
+        self.rooms = [
+            Room.objects.create(title=f'Room {n}', room_type='double', price=50000, image='') for n in range(2)
+        ]
+        self.start = date.today() + timedelta(days=10)
+
+    def day(self, offset):
+        return self.start + timedelta(days=offset)
+
+    def book(self, room, check_in, check_out, confirmed=True):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Booking.objects.create(
+                room=room, name='Guest', email='guest@example.com', phone='0',
+                check_in=self.day(check_in), check_out=self.day(check_out), confirmed=confirmed,
+            )
+
+    def test_room_schedule_overlaps(self):
+        schedule = availability.RoomSchedule([(self.day(5), self.day(8)), (self.day(0), self.day(20))])
+        self.assertTrue(schedule.overlaps(self.day(10), self.day(12)))
+        self.assertTrue(schedule.overlaps(self.day(-3), self.day(1)))
+        # Check-out day is free for the next guest and vice versa
+        self.assertFalse(schedule.overlaps(self.day(20), self.day(22)))
+        self.assertFalse(schedule.overlaps(self.day(-3), self.day(0)))
+        self.assertFalse(availability.RoomSchedule([]).overlaps(self.day(0), self.day(1)))
+
+    def test_saves_and_deletes_invalidate_schedules(self):
+        first, second = self.rooms
+        self.assertTrue(availability.is_available(first.pk, self.day(0), self.day(3)))
+
+        booking = self.book(first, 1, 4)
+        self.book(second, 1, 4, confirmed=False)
+        self.assertFalse(availability.is_available(first.pk, self.day(0), self.day(3)))
+        self.assertEqual(availability.available_rooms(self.day(0), self.day(3)), [second.pk])
+        self.assertCountEqual(availability.available_rooms(self.day(4), self.day(6)), [first.pk, second.pk])
+
+        booking.check_in, booking.check_out = self.day(10), self.day(12)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        self.assertTrue(availability.is_available(first.pk, self.day(0), self.day(3)))
+        self.assertFalse(availability.is_available(first.pk, self.day(11), self.day(15)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.delete()
+        self.assertTrue(availability.is_available(first.pk, self.day(11), self.day(15)))
+
+    def test_occupancy_calendar(self):
+        first, second = self.rooms
+        self.book(first, -2, 2)
+        self.book(first, 4, 5)
+        self.book(second, 3, 9)
+        self.book(second, 0, 1, confirmed=False)
+
+        self.assertEqual(availability.occupancy_calendar(self.day(0), 6), {first.pk: '110010', second.pk: '000111'})
+
+        response = self.client.get('/availability/calendar/', {'start': self.day(0).isoformat(), 'days': 6})
+        self.assertEqual(response.json()['rooms'], {str(first.pk): '110010', str(second.pk): '000111'})
+        for params in [{'days': 0}, {'days': 367}, {'start': '2025-02-30'}, {'start': '9999-12-30', 'days': 10}]:
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/availability/calendar/', params).status_code, 400)
+
+    @override_settings(CACHE_VERSION_TIMEOUT=30)
+    def test_local_versions_expire(self):
+        room = self.rooms[0]
+        booking = self.book(room, 1, 4, confirmed=False)
+        self.assertTrue(availability.is_available(room.pk, self.day(0), self.day(3)))
+        # Another process's write is never announced to this process's cache
+        Booking.objects.filter(pk=booking.pk).update(confirmed=True)
+        self.assertTrue(availability.is_available(room.pk, self.day(0), self.day(3)))
+
+        with mock.patch('time.time', return_value=time.time() + 31):
+            self.assertFalse(availability.is_available(room.pk, self.day(0), self.day(3)))
+
+
+@override_settings(ROOT_URLCONF='main.tests')
+class BookingAdminTests(TestCase):
+
+    def setUp(self):
+        staff = User.objects.create_user('staff', password='pw', is_staff=True, is_superuser=True)
+        self.client.force_login(staff)
+        self.room = Room.objects.create(title='Room', room_type='double', price=50000, image='')
+        self.start = date.today() + timedelta(days=10)
+        self.first = self.book(0, 3, confirmed=True)
+        self.second = self.book(5, 8, confirmed=True)
+
+    def book(self, check_in, check_out, confirmed=False):
+        return Booking.objects.create(
+            room=self.room, name='Guest', email='guest@example.com', phone='0', confirmed=confirmed,
+            check_in=self.start + timedelta(days=check_in), check_out=self.start + timedelta(days=check_out),
+        )
+
+    def test_clashing_edit_of_a_confirmed_stay_is_rejected(self):
+        response = self.client.post(f'/admin/main/booking/{self.second.pk}/change/', {
+            'room': self.room.pk, 'name': 'Guest', 'email': 'guest@example.com', 'phone': '0',
+            'check_in': self.start + timedelta(days=2), 'check_out': self.start + timedelta(days=6),
+            'guests': 1, 'confirmed': 'on',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f'overlaps confirmed booking(s) #{self.first.pk}')
+        self.second.refresh_from_db()
+        self.assertTrue(self.second.confirmed)
+        self.assertEqual(self.second.check_in, self.start + timedelta(days=5))
+
+    def test_changelist_refuses_a_clashing_confirmation(self):
+        request = self.book(1, 2)
+        bookings = Booking.objects.order_by('-created_at')
+        data = {
+            'form-TOTAL_FORMS': len(bookings), 'form-INITIAL_FORMS': len(bookings), '_save': 'Save',
+        }
+        for index, booking in enumerate(bookings):
+            data[f'form-{index}-id'] = booking.pk
+            if booking.confirmed or booking == request:
+                data[f'form-{index}-confirmed'] = 'on'
+
+        response = self.client.post('/admin/main/booking/', data)
+
+        self.assertContains(response, f'overlaps confirmed booking(s) #{self.first.pk}')
+        request.refresh_from_db()
+        self.assertFalse(request.confirmed)
+
+
+class BookingRollupTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.room = Room.objects.create(title='Room', room_type='double', price=50000, image='')
+        self.start = date.today() + timedelta(days=10)
+
+    def book(self, nights, confirmed=True):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Booking.objects.create(
+                room=self.room, name='Guest', email='guest@example.com', phone='0', confirmed=confirmed,
+                check_in=self.start, check_out=self.start + timedelta(days=nights),
+            )
+
+    def test_saves_refresh_the_rollups(self):
+        booking = self.book(3)
+        nights = BookingDailyRollup.objects.filter(room=self.room, nights_booked=1)
+        self.assertEqual(nights.count(), 3)
+
+        booking.confirmed = False
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        self.assertFalse(nights.exists())
+        self.assertEqual(BookingDailyRollup.objects.get(day=date.today()).bookings_created, 1)
+
+    def test_revenue_adds_up_to_the_cost(self):
+        self.book(3)
+        days = BookingDailyRollup.objects.filter(room=self.room, nights_booked=1).order_by('day')
+        self.assertEqual([day.revenue for day in days], [Decimal('16666.66'), Decimal('16666.66'), Decimal('16666.68')])
+
+        # A refresh of part of the stay keeps each night's share
+        reports.refresh_rollups(self.room.pk, self.start + timedelta(days=2), self.start + timedelta(days=2))
+        self.assertEqual(sum(day.revenue for day in days), Decimal('50000'))
+
+    @override_settings(ROOT_URLCONF='main.tests')
+    def test_report_data(self):
+        self.book(3)
+        self.book(2, confirmed=False)
+        staff = User.objects.create_user('staff', password='pw', is_staff=True)
+        self.client.force_login(staff)
+
+        response = self.client.get('/reports/bookings/data/', {'months': 3})
+
+        months = response.json()['months']
+        self.assertEqual(sum(month['bookings_created'] for month in months), 2)
+        self.assertEqual(sum(month['bookings_confirmed'] for month in months), 1)
+        self.assertEqual(sum(month['nights_booked'] for month in months), 3)
+        self.assertEqual(sum(Decimal(month['revenue']) for month in months), Decimal('50000'))
+        self.assertEqual(self.client.get('/reports/bookings/data/', {'months': 'x'}).status_code, 400)
+
+    def test_failed_rollup_does_not_fail_the_booking(self):
+        with mock.patch.object(reports, 'refresh_rollups', side_effect=OperationalError('database is locked')):
+            with self.assertLogs(level='ERROR'):
+                booking = self.book(3)
+        self.assertTrue(Booking.objects.filter(pk=booking.pk).exists())
+        self.assertFalse(availability.is_available(self.room.pk, self.start, self.start + timedelta(days=1)))
+
+
+@override_settings(ROOT_URLCONF='main.tests')
+class AnalyticsTests(TestCase):
+    today = date(2025, 6, 1)
+
+    def test_room_metrics(self):
+        columns = {
+            'room': np.array([1, 1, 2, 7]),
+            'check_in': np.array(['2025-05-01', '2025-06-10', '2025-05-20', '2025-05-01'], dtype='datetime64[D]'),
+            'check_out': np.array(['2025-05-11', '2025-07-20', '2025-05-22', '2025-05-02'], dtype='datetime64[D]'),
+            'created': np.array(['2025-04-21', '2025-06-01', '2025-05-25', '2025-04-01'], dtype='datetime64[D]'),
+        }
+        rooms = analytics.room_metrics(
+            columns, np.array([1, 2, 3]), np.array([1000.0, 500.0, 800.0]), date(2025, 5, 1), date(2025, 6, 1), self.today,
+        )
+
+        self.assertEqual([room['room_id'] for room in rooms], [1, 2, 3])
+        self.assertEqual(rooms[0], {
+            'room_id': 1, 'confirmed_bookings': 2, 'occupied_nights': 10, 'occupancy_rate': round(10 / 31, 4),
+            'average_stay_nights': 25.0, 'average_lead_time_days': 9.5, 'projected_revenue': 1000.0,
+        })
+        # Lead time never goes negative; bookings of unknown rooms are ignored
+        self.assertEqual(rooms[1]['average_lead_time_days'], 0.0)
+        self.assertEqual(rooms[1]['occupied_nights'], 2)
+        self.assertEqual(rooms[2]['confirmed_bookings'], 0)
+
+    def test_endpoint_loads_only_relevant_bookings(self):
+        room = Room.objects.create(title='Room', room_type='double', price=50000, image='')
+        today = date.today()
+        for check_in, nights in [(-400, 3), (-10, 4), (30, 60)]:
+            Booking.objects.create(
+                room=room, name='Guest', email='guest@example.com', phone='0', confirmed=True,
+                check_in=today + timedelta(days=check_in), check_out=today + timedelta(days=check_in + nights),
+            )
+        self.assertEqual(analytics.relevant_bookings(today - timedelta(days=90), today, today).count(), 2)
+
+        staff = User.objects.create_user('staff', password='pw', is_staff=True)
+        self.client.force_login(staff)
+        metrics = self.client.get('/reports/analytics/').json()['rooms'][0]
+        self.assertEqual(metrics['confirmed_bookings'], 2)
+        self.assertEqual(metrics['occupied_nights'], 4)
+        self.assertEqual(metrics['projected_revenue'], 100000.0)
+        self.assertEqual(self.client.get('/reports/analytics/', {'start': '2025-06-01', 'end': '2025-05-01'}).status_code, 400)
+
+
+class TemporaryMediaMixin:
+    """Point MEDIA_ROOT at a directory that is removed after each test."""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        override = self.settings(MEDIA_ROOT=media_root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def make_image(self, width=640, height=480, fmt='JPEG'):
+        buffer = io.BytesIO()
+        Image.new('RGB', (width, height), (200, 120, 40)).save(buffer, fmt)
+        return ContentFile(buffer.getvalue())
+
+
+@override_settings(ROOT_URLCONF='main.tests')
+class PublicPageCacheTests(TemporaryMediaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.room = Room(title='Garden suite', room_type='suite', price=90000)
+        self.room.image.save('garden.jpg', self.make_image(), save=False)
+        self.room.save()
+        self.url = f'/rooms/{self.room.pk}/'
+
+    def test_page_is_served_from_cache_until_the_room_changes(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Garden suite')
+        self.assertIn('no-cache', response['Cache-Control'])
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url)
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached['ETag'], etag)
+
+        self.room.title = 'Lake suite'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Lake suite')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_revalidation_gets_304(self):
+        response = self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            revalidated = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated['ETag'], response['ETag'])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_errors_are_not_cached(self):
+        self.assertEqual(self.client.get('/rooms/999999/').status_code, 404)
+        Room.objects.filter(pk=self.room.pk).update(id=999999)
+        self.assertEqual(self.client.get('/rooms/999999/').status_code, 200)
+
+
+class SiteStatsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.room = Room.objects.create(title='Garden suite', room_type='suite', price=90000, image='')
+
+    def test_one_aggregate_query_per_model(self):
+        Room.objects.create(title='Lake room', room_type='single', price=50000, image='', is_featured=True)
+        ContactMessage.objects.create(name='B', email='b@example.com', message='Hello')
+        cache.clear()
+        with self.assertNumQueries(3):
+            counters = stats.site_stats()
+        self.assertEqual(counters, {
+            'total_rooms': 2, 'featured_rooms': 1,
+            'total_bookings': 0, 'confirmed_bookings': 0, 'pending_bookings': 0,
+            'total_messages': 1,
+        })
+
+    def test_stats_are_cached_until_a_counted_model_changes(self):
+        self.assertEqual(stats.site_stats()['total_rooms'], 1)
+        with self.assertNumQueries(0):
+            cached = stats.site_stats()
+        self.assertEqual(cached['total_bookings'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(
+                room=self.room, name='A', email='a@example.com', phone='0',
+                check_in=date(2025, 6, 1), check_out=date(2025, 6, 3),
+            )
+        self.assertEqual(stats.site_stats()['total_bookings'], 1)
+        self.assertEqual(stats.site_stats()['pending_bookings'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ContactMessage.objects.create(name='B', email='b@example.com', message='Hello')
+        self.assertEqual(stats.site_stats()['total_messages'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Room.objects.create(title='Lake room', room_type='single', price=50000, image='', is_featured=True)
+        self.assertEqual(stats.site_stats()['total_rooms'], 2)
+        self.assertEqual(stats.site_stats()['featured_rooms'], 1)
+
+
+class ImageDerivativeTests(TemporaryMediaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.room = Room(title='Garden suite', room_type='suite', price=90000)
+        self.room.image.save('garden.jpg', self.make_image(width=1200, height=800), save=False)
+
+    def render(self, field_file):
+        return Template('{% load responsive_images %}{% responsive_img image alt="Garden" class="card" %}').render(
+            Context({'image': field_file})
+        )
+
+    def test_every_width_is_written_in_both_formats(self):
+        self.assertFalse(images.has_derivatives(self.room.image))
+        self.assertEqual(images.generate_derivatives(self.room.image), 8)
+        self.assertTrue(images.has_derivatives(self.room.image))
+        self.assertEqual(images.generate_derivatives(self.room.image), 0)
+
+        storage = self.room.image.storage
+        with storage.open('rooms/garden_480w.jpg') as thumbnail:
+            self.assertEqual(Image.open(thumbnail).size, (480, 320))
+        # Narrower originals are re-encoded at their own width
+        with storage.open('rooms/garden_1600w.webp') as large:
+            self.assertEqual(Image.open(large).size, (1200, 800))
+
+    def test_saving_a_room_generates_derivatives(self):
+        self.room.save()
+        self.assertTrue(images.has_derivatives(self.room.image))
+        self.assertEqual(images.thumbnail_url(self.room.image), '/media/rooms/garden_160w.jpg')
+
+    def test_bad_upload_does_not_break_the_save(self):
+        self.room.image.save('broken.jpg', ContentFile(b'not an image'), save=False)
+        with self.assertLogs('main.images', level='WARNING'):
+            self.room.save()
+        self.assertFalse(images.has_derivatives(self.room.image))
+        self.assertEqual(images.thumbnail_url(self.room.image), self.room.image.url)
+
+    def test_responsive_img(self):
+        html = self.render(self.room.image)
+        self.assertHTMLEqual(html, '<img src="/media/rooms/garden.jpg" alt="Garden" class="card" loading="lazy">')
+
+        images.generate_derivatives(self.room.image)
+        html = self.render(self.room.image)
+        self.assertInHTML(
+            '<source type="image/webp" sizes="100vw" srcset="'
+            '/media/rooms/garden_160w.webp 160w, /media/rooms/garden_480w.webp 480w, '
+            '/media/rooms/garden_960w.webp 960w, /media/rooms/garden_1600w.webp 1600w">',
+            html,
+        )
+        self.assertIn('srcset="/media/rooms/garden_160w.jpg 160w,', html)
+        self.assertIn('src="/media/rooms/garden.jpg"', html)
+
+
+@override_settings(ROOT_URLCONF='main.tests')
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        Gallery.objects.bulk_create(
+            Gallery(title=f'Photo {n}', image=f'gallery/photo{n}.jpg') for n in range(30)
+        )
+        # Half the photos share a timestamp, so pages must break ties on id
+        Gallery.objects.filter(title__in=[f'Photo {n}' for n in range(10, 25)]).update(
+            uploaded_at=timezone.now() - timedelta(days=1)
+        )
+        self.expected = list(Gallery.objects.order_by('-uploaded_at', '-id').values_list('pk', flat=True))
+
+    def test_pages_cover_every_row_once_in_order(self):
+        seen, cursor = [], None
+        while True:
+            rows, cursor = keyset_page(Gallery.objects.all(), 'uploaded_at', 7, cursor)
+            seen.extend(row.pk for row in rows)
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.expected)
+
+    def test_invalid_cursors(self):
+        for cursor in ['not a cursor', 'abc', base64.urlsafe_b64encode(b'2025-01-01T00:00:00').decode()]:
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursor):
+                decode_cursor(cursor)
+
+    def test_infinite_scroll_endpoint(self):
+        response = self.client.get('/gallery/')
+        self.assertContains(response, 'data-next-url="/gallery/photos/?cursor=')
+        self.assertEqual(len(response.context['photos']), 24)
+
+        data = self.client.get(f"/gallery/photos/?cursor={response.context['next_cursor']}").json()
+        self.assertEqual(data['html'].count('gallery-item'), 6)
+        self.assertIsNone(data['next_url'])
+
+        response = self.client.get('/gallery/photos/', {'cursor': 'not a cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Invalid cursor'})
+
+
+class RoomFacetTests(TestCase):
+
+    def setUp(self):
+        Room.objects.bulk_create([
+            Room(title='Attic', room_type='single', price=30000, image=''),
+            Room(title='Corner', room_type='single', price=60000, image=''),
+            Room(title='Garden', room_type='double', price=80000, image=''),
+            Room(title='Lake', room_type='suite', price=150000, image=''),
+            Room(title='Tower', room_type='suite', price=100000, image=''),
+        ])
+
+    def facets(self, **params):
+        with self.assertNumQueries(1):
+            return catalog.room_facets(catalog.clean_filters(params))
+
+    def test_unfiltered_counts(self):
+        self.assertEqual(self.facets(), {
+            'type': {'single': 2, 'double': 1, 'suite': 2},
+            'price': {'budget': 1, 'medium': 3, 'premium': 1},
+        })
+
+    def test_each_facet_honours_the_other_selection(self):
+        self.assertEqual(self.facets(type='suite'), {
+            'type': {'single': 2, 'double': 1, 'suite': 2},
+            'price': {'budget': 0, 'medium': 1, 'premium': 1},
+        })
+        self.assertEqual(self.facets(price='medium'), {
+            'type': {'single': 1, 'double': 1, 'suite': 1},
+            'price': {'budget': 1, 'medium': 3, 'premium': 1},
+        })
+
+    def test_counts_match_the_filtered_listing(self):
+        for room_type in ['', 'single', 'double', 'suite']:
+            for price in ['', 'budget', 'medium', 'premium']:
+                filters = catalog.clean_filters({'type': room_type, 'price': price})
+                facets = catalog.room_facets(filters)
+                with self.subTest(type=room_type, price=price):
+                    if room_type:
+                        self.assertEqual(facets['type'][room_type], catalog.filter_rooms(filters).count())
+                    if price:
+                        self.assertEqual(facets['price'][price], catalog.filter_rooms(filters).count())
+
+    def test_unknown_filters_are_dropped(self):
+        self.assertEqual(
+            catalog.clean_filters({'type': 'penthouse', 'price': 'free', 'sort': 'random'}),
+            {'type': '', 'price': '', 'sort': 'featured'},
+        )
+
+
+class MinifyTests(SimpleTestCase):
+
+    def test_css(self):
+        source = """
+            /* Layout */
+            .card  >  .title ,  a:hover {
+                color : red ;
+                margin: 0 auto;;
+            }
+            a :hover { content : "a : b  /* kept */" }
+        """
+        self.assertEqual(
+            minify_css(source),
+            '.card>.title,a:hover{color:red;margin:0 auto}a :hover{content:"a : b  /* kept */"}',
+        )
+
+    def test_js_keeps_line_breaks_strings_and_regexes(self):
+        source = """// header
+            var a = 1   /* inline */ + 2;
+            var url = "http://example.com"; // trailing
+
+            function half(x) {
+                return x / 2 / 1;
+            }
+            var re = /[/*]+\\//g
+            let t = `a // b`
+        """
+        self.assertEqual(minify_js(source), (
+            'var a = 1 + 2;\n'
+            'var url = "http://example.com";\n'
+            'function half(x) {\n'
+            'return x / 2 / 1;\n'
+            '}\n'
+            'var re = /[/*]+\\//g\n'
+            'let t = `a // b`'
+        ))
+
+
+@override_settings(ROOT_URLCONF='main.tests')
+class MediaServeTests(TemporaryMediaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        default_storage.save('rooms/notes.txt', ContentFile(b'hello'))
+        self.url = '/media/rooms/notes.txt'
+
+    def test_file_is_served_with_validators(self):
+        response = self.client.get(self.url)
+        self.assertEqual(b''.join(response.streaming_content), b'hello')
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_conditional_requests_get_304(self):
+        response = self.client.get(self.url)
+        for headers in [
+            {'HTTP_IF_NONE_MATCH': response['ETag']},
+            {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']},
+        ]:
+            with self.subTest(headers=headers):
+                revalidated = self.client.get(self.url, **headers)
+                self.assertEqual(revalidated.status_code, 304)
+                self.assertEqual(revalidated['ETag'], response['ETag'])
+
+        default_storage.delete('rooms/notes.txt')
+        default_storage.save('rooms/notes.txt', ContentFile(b'hello again'))
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_missing_files_and_traversal_are_404(self):
+        for url in ['/media/rooms/missing.txt', '/media/rooms/', '/media/..%2F..%2Fmanage.py']:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+
+@override_settings(ROOT_URLCONF='main.tests')
+class RequestMetricsTests(TestCase):
+
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        cache.clear()
+
+    def test_requests_are_measured_per_view(self):
+        self.client.get('/gallery/photos/')
+        self.client.get('/gallery/photos/', {'cursor': 'not a cursor'})
+
+        text = metrics.render()
+        self.assertIn('http_requests_total{view="gallery_photos",status="200"} 1', text)
+        self.assertIn('http_requests_total{view="gallery_photos",status="400"} 1', text)
+        self.assertIn('http_request_duration_seconds_count{view="gallery_photos"} 2', text)
+        self.assertIn('http_db_queries_bucket{view="gallery_photos",le="+Inf"} 2', text)
+        _, template_seconds = metrics.TEMPLATE_TIME.series['gallery_photos']
+        self.assertGreater(template_seconds, 0)
+
+    def test_unnamed_urls_are_not_recorded(self):
+        self.client.get('/no-such-page/')
+        self.assertEqual(metrics.REQUESTS.values, {})
+
+    @override_settings(SLOW_REQUEST_SECONDS=0)
+    def test_slow_requests_are_logged_with_their_sql(self):
+        with self.assertLogs('main.metrics', level='WARNING') as logs:
+            self.client.get('/gallery/photos/')
+        self.assertIn('Slow request GET /gallery/photos/ (gallery_photos)', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+    def test_histogram_rendering(self):
+        histogram = metrics.Histogram('size', 'Sizes.', (10, 100))
+        histogram.observe('a"b', 5)
+        histogram.observe('a"b', 50)
+        histogram.observe('a"b', 500)
+        self.assertEqual(histogram.render(), [
+            '# HELP size Sizes.',
+            '# TYPE size histogram',
+            'size_bucket{view="a\\"b",le="10"} 1',
+            'size_bucket{view="a\\"b",le="100"} 2',
+            'size_bucket{view="a\\"b",le="+Inf"} 3',
+            'size_sum{view="a\\"b"} 555',
+            'size_count{view="a\\"b"} 3',
+        ])
+
+    def test_metrics_view_is_staff_only(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        self.client.force_login(User.objects.create_user('staff', password='pw', is_staff=True))
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn('# TYPE http_requests_total counter', response.content.decode())
@@ -4,14 +4,22 @@ from . import views
 urlpatterns = [
     path('', views.home, name='home'),
     path('rooms/', views.rooms, name='rooms'),
+    path('rooms/results/', views.rooms_results, name='rooms_results'),
     path('rooms/<int:room_id>/', views.room_detail, name='room_detail'),
     path('gallery/', views.gallery, name='gallery'),
+    path('gallery/photos/', views.gallery_photos, name='gallery_photos'),
     path('about/', views.about, name='about'),
     path('contact/', views.contact, name='contact'),
     path('booking/', views.booking, name='booking'),
     path('booking/success/<int:booking_id>/', views.booking_success, name='booking_success'),
+    path('search/', views.site_search, name='site_search'),
     path('check-availability/', views.check_availability, name='check_availability'),
+    path('availability/calendar/', views.availability_calendar, name='availability_calendar'),
     path('reports/bookings/', views.booking_report, name='booking_report'),
+    path('reports/bookings/data/', views.booking_report_data, name='booking_report_data'),
+    path('reports/analytics/', views.booking_analytics, name='booking_analytics'),
+    path('reports/export/<str:dataset>.<str:fmt>', views.export_data, name='export_data'),
+    path('metrics/', views.request_metrics, name='request_metrics'),
 ]
 
 # was orginal urlpatterns
@@ -0,0 +1,114 @@
+"""Booking rules shared by the booking form, the admin and bulk imports.
+
+A booking may not start in the past, must check out after it checks in and
+may not bring more guests than the room type holds (2 in a single room, 4
+otherwise).  ``booking_errors`` checks one booking; ``validate_columns``
+checks whole columns at once with NumPy (dates as ``datetime64[D]``), so a
+batch costs a few array comparisons instead of a Python call per row.
+
+A missing value (None/NaT date, unknown room type, no guest count) skips the
+rules that need it, as the form does when the field itself already failed.
+"""
+from datetime import date
+
+import numpy as np
+
+SINGLE_ROOM_GUESTS = 2
+ROOM_GUESTS = 4
+
+PAST_CHECK_IN = 'Check-in date cannot be in the past.'
+CHECK_OUT_ORDER = 'Check-out date must be after check-in date.'
+
+
+def max_guests(room_type):
+    return SINGLE_ROOM_GUESTS if room_type == 'single' else ROOM_GUESTS
+
+
+def capacity_message(room_type):
+    return f'This {room_type} room can accommodate maximum {max_guests(room_type)} guests.'
+
+
+def booking_errors(check_in, check_out, room_type, guests, today=None, allow_past=False):
+    """{field: message} for every rule one booking breaks; empty when it passes.
+
+    ``allow_past`` skips the past check-in rule, for bookings that are being
+    reviewed rather than requested.
+    """
+    errors = {}
+    if check_in and check_out:
+        if not allow_past and check_in < (today or date.today()):
+            errors['check_in'] = PAST_CHECK_IN
+        if check_out <= check_in:
+            errors['check_out'] = CHECK_OUT_ORDER
+    if room_type and guests and guests > max_guests(room_type):
+        errors['guests'] = capacity_message(room_type)
+    return errors
+
+
+class ColumnValidation:
+    """Per-rule boolean masks over a batch of bookings."""
+
+    def __init__(self, past, order, capacity, room_type):
+        self.past = past
+        self.order = order
+        self.capacity = capacity
+        self.room_type = room_type
+        self.valid = ~(past | order | capacity)
+
+    def __len__(self):
+        return len(self.valid)
+
+    def invalid(self):
+        """Indices of the rows that break at least one rule."""
+        return np.flatnonzero(~self.valid)
+
+    def errors(self, index):
+        """The booking_errors() dict of one row."""
+        errors = {}
+        if self.past[index]:
+            errors['check_in'] = PAST_CHECK_IN
+        if self.order[index]:
+            errors['check_out'] = CHECK_OUT_ORDER
+        if self.capacity[index]:
+            errors['guests'] = capacity_message(str(self.room_type[index]))
+        return errors
+
+    def counts(self):
+        return {
+            'check_in': int(self.past.sum()),
+            'check_out': int(self.order.sum()),
+            'guests': int(self.capacity.sum()),
+            'invalid': int(len(self) - self.valid.sum()),
+        }
+
+
+def validate_columns(check_in, check_out, room_type, guests, today=None, allow_past=False):
+    """Apply the booking rules to parallel columns.
+
+    Dates may be ``datetime64[D]`` arrays or sequences of dates with None for
+    missing values; room types are strings ('' when unknown) and guest counts
+    integers (0 when missing).  Returns a ColumnValidation.
+    """
+    check_in = np.asarray(check_in, dtype='datetime64[D]')
+    check_out = np.asarray(check_out, dtype='datetime64[D]')
+    room_type = np.asarray(room_type, dtype=str)
+    guests = np.asarray(guests, dtype=np.int64)
+
+    dated = ~(np.isnat(check_in) | np.isnat(check_out))
+    if allow_past:
+        past = np.zeros(len(check_in), dtype=bool)
+    else:
+        past = dated & (check_in < np.datetime64(today or date.today(), 'D'))
+    order = dated & (check_out <= check_in)
+    limit = np.where(room_type == 'single', SINGLE_ROOM_GUESTS, ROOM_GUESTS)
+    capacity = (room_type != '') & (guests > limit)
+    return ColumnValidation(past, order, capacity, room_type)
+
+
+def validate_queryset(queryset, today=None, allow_past=False):
+    """(primary keys, ColumnValidation) for stored bookings, read in one query."""
+    rows = list(queryset.values_list('pk', 'check_in', 'check_out', 'room__room_type', 'guests'))
+    if not rows:
+        return [], validate_columns([], [], [], [], today, allow_past)
+    pks, check_in, check_out, room_type, guests = zip(*rows)
+    return list(pks), validate_columns(check_in, check_out, room_type, guests, today, allow_past)
@@ -1,95 +1,139 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
-from django.core.mail import send_mail
+from django.http import Http404, HttpResponse, JsonResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
 from django.conf import settings
 from django.contrib import messages
 from django.utils import timezone
-from datetime import datetime, timedelta
+from django.core.paginator import Paginator
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
+import calendar
+import json
 from .models import Room, Gallery, Apartment, Booking, ContactMessage
 from .forms import BookingForm, ContactForm
+from . import analytics, availability, bookings, catalog, exports, metrics, outbox, reports, search
+from .caching import cache_public_page
+from .stats import site_stats
+from .pagination import InvalidCursor, keyset_page
 
+FEATURED_ROOMS_LIMIT = 6
+GALLERY_PAGE_SIZE = 24
+ROOMS_PAGE_SIZE = 12
+REPORT_MONTHS = 12
+CALENDAR_DEFAULT_DAYS = 90
+CALENDAR_MAX_DAYS = 366
+SEARCH_RESULTS_LIMIT = 20
+SEARCH_QUERY_MAX_LENGTH = 200
+SEARCH_SNIPPET_LENGTH = 160
+
+@cache_public_page('room', 'gallery', 'apartment')
 def home(request):
-    featured_rooms = Room.objects.filter(is_featured=True)[:6]
+    featured_rooms = Room.objects.filter(is_featured=True)[:FEATURED_ROOMS_LIMIT]
     gallery_images = Gallery.objects.all()[:8]
     apartments = Apartment.objects.all()
     
     # Statistics for home page
-    total_rooms = Room.objects.count()
-    featured_count = featured_rooms.count()
+    stats = site_stats()
     
     context = {
         'featured_rooms': featured_rooms,
         'gallery_images': gallery_images,
         'apartments': apartments,
-        'total_rooms': total_rooms,
-        'featured_count': featured_count,
+        'total_rooms': stats['total_rooms'],
+        'featured_count': min(stats['featured_rooms'], FEATURED_ROOMS_LIMIT),
         'today': timezone.now().date().isoformat(),
         'tomorrow': (timezone.now() + timedelta(days=1)).date().isoformat(),
     }
     return render(request, 'main/home.html', context)
 
-def rooms(request):
-    all_rooms = Room.objects.all().order_by('-is_featured', 'price')
-    
-    # Get filter parameters
-    room_type = request.GET.get('type', '')
-    price_range = request.GET.get('price', '')
+def _rooms_listing(request):
+    """Filtered page of rooms plus facet counts, shared by the HTML and JSON views"""
+    filters = catalog.clean_filters(request.GET)
+    paginator = Paginator(catalog.filter_rooms(filters), ROOMS_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    query_string = urlencode({key: value for key, value in filters.items() if value})
     
-    # Apply filters
-    if room_type:
-        all_rooms = all_rooms.filter(room_type=room_type)
-    if price_range:
-        if price_range == 'budget':
-            all_rooms = all_rooms.filter(price__lt=50000)
-        elif price_range == 'medium':
-            all_rooms = all_rooms.filter(price__range=(50000, 100000))
-        elif price_range == 'premium':
-            all_rooms = all_rooms.filter(price__gt=100000)
-    
-    context = {
-        'rooms': all_rooms,
+    return {
+        'rooms': page_obj.object_list,
+        'page_obj': page_obj,
+        'query_string': query_string,
+        'facets': catalog.room_facets(filters),
         'room_types': Room.ROOM_TYPES,
-        'current_filters': {
-            'type': room_type,
-            'price': price_range,
-        }
+        'price_ranges': catalog.PRICE_RANGE_CHOICES,
+        'sort_options': catalog.SORT_CHOICES,
+        'current_filters': filters,
     }
+
+@cache_public_page('room')
+def rooms(request):
+    context = _rooms_listing(request)
+    context['facets_json'] = json.dumps(context['facets'])
     return render(request, 'main/rooms.html', context)
 
+@cache_public_page('room')
+def rooms_results(request):
+    """JSON variant of the rooms listing used by the filter UI"""
+    context = _rooms_listing(request)
+    page_obj = context['page_obj']
+    return JsonResponse({
+        'html': render_to_string('main/partials/room_cards.html', context) if page_obj.object_list else '',
+        'pager': render_to_string('main/partials/room_pager.html', context),
+        'facets': context['facets'],
+        'count': page_obj.paginator.count,
+        'page': page_obj.number,
+        'num_pages': page_obj.paginator.num_pages,
+    })
+
+@cache_public_page('gallery')
 def gallery(request):
-    photos = Gallery.objects.all().order_by('-uploaded_at')
-    context = {'photos': photos}
+    # First page only; further pages stream in through gallery_photos
+    photos, next_cursor = keyset_page(Gallery.objects.all(), 'uploaded_at', GALLERY_PAGE_SIZE)
+    context = {'photos': photos, 'next_cursor': next_cursor}
     return render(request, 'main/gallery.html', context)
 
+@cache_public_page('gallery')
+def gallery_photos(request):
+    """JSON page of gallery cards for infinite scrolling"""
+    try:
+        photos, next_cursor = keyset_page(
+            Gallery.objects.all(), 'uploaded_at', GALLERY_PAGE_SIZE, request.GET.get('cursor')
+        )
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    
+    next_url = f"{reverse('gallery_photos')}?cursor={next_cursor}" if next_cursor else None
+    return JsonResponse({
+        'html': render_to_string('main/partials/gallery_items.html', {'photos': photos}),
+        'next_url': next_url,
+    })
+
+@cache_public_page('room', 'gallery', 'booking')
 def about(request):
     gallery_images = Gallery.objects.all()[:8]
-    total_rooms = Room.objects.count()
-    total_bookings = Booking.objects.filter(confirmed=True).count()
+    stats = site_stats()
     
     context = {
         'gallery_images': gallery_images,
-        'total_rooms': total_rooms,
-        'total_bookings': total_bookings,
+        'total_rooms': stats['total_rooms'],
+        'total_bookings': stats['confirmed_bookings'],
     }
     return render(request, 'main/about.html', context)
 
-def contact(request):
+async def contact(request):
+    """Async: the only I/O is one INSERT for the message and one for the queued email"""
     if request.method == 'POST':
         form = ContactForm(request.POST)
         if form.is_valid():
-            contact_message = form.save()
+            contact_message = await ContactMessage.objects.acreate(**form.cleaned_data)
             
-            # Send email notification (optional)
-            try:
-                send_mail(
-                    f'New Contact Message from {contact_message.name}',
-                    f'Name: {contact_message.name}\nEmail: {contact_message.email}\nMessage: {contact_message.message}',
-                    settings.DEFAULT_FROM_EMAIL,
-                    [settings.CONTACT_EMAIL],
-                    fail_silently=True,
-                )
-            except:
-                pass  # Email sending is optional
+            # Queue email notification; the send_queued_mail worker delivers it
+            await outbox.aenqueue(
+                f'New Contact Message from {contact_message.name}',
+                f'Name: {contact_message.name}\nEmail: {contact_message.email}\nMessage: {contact_message.message}',
+                [settings.CONTACT_EMAIL],
+            )
             
             messages.success(request, 'Thank you for your message! We will get back to you soon.')
             return redirect('contact')
@@ -97,44 +141,51 @@ def contact(request):
         form = ContactForm()
     
     context = {'form': form}
-    return render(request, 'main/contact.html', context)
+    return await sync_to_async(render)(request, 'main/contact.html', context)
+
+def _place_booking(form):
+    """Validate the form and place the booking; None when invalid or taken"""
+    if not form.is_valid():
+        return None
+    try:
+        # Overlap check and insert run atomically under a room lock
+        return bookings.place_booking(form.save(commit=False))
+    except bookings.BookingConflict:
+        form.add_error(None, 'This room is already booked for the selected dates. Please choose other dates or another room.')
+        return None
+
+async def booking(request):
+    """Async booking form
 
-def booking(request):
+    Validation and the locked insert stay synchronous (they need a
+    transaction) and run in one worker thread; the confirmation email is
+    queued through the async ORM.
+    """
     if request.method == 'POST':
         form = BookingForm(request.POST)
-        if form.is_valid():
-            booking = form.save()
-            
-            # Calculate total cost based on duration
-            check_in = booking.check_in
-            check_out = booking.check_out
-            duration = (check_out - check_in).days
-            months = max(1, duration // 30)  # Minimum 1 month
-            total_cost = booking.room.price * months
+        booking = await sync_to_async(_place_booking)(form)
+        
+        if booking:
+            total_cost = booking.estimated_cost()
             
-            # Send confirmation email (optional)
-            try:
-                send_mail(
-                    f'Booking Request - {booking.room.title}',
-                    f'Hello {booking.name},\n\n'
-                    f'Thank you for your booking request at UBWIZA Apartment!\n\n'
-                    f'Booking Details:\n'
-                    f'Room: {booking.room.title}\n'
-                    f'Check-in: {booking.check_in}\n'
-                    f'Check-out: {booking.check_out}\n'
-                    f'Guests: {booking.guests}\n'
-                    f'Estimated Cost: {total_cost} RWF\n\n'
-                    f'We will review your request and contact you within 24 hours to confirm your booking.\n\n'
-                    f'Best regards,\n'
-                    f'UBWIZA Apartment Team\n'
-                    f'Phone: +250 791 010 558\n'
-                    f'Email: tuyambazesylvain5@gmail.com',
-                    settings.DEFAULT_FROM_EMAIL,
-                    [booking.email],
-                    fail_silently=True,
-                )
-            except Exception as e:
-                print(f"Email sending failed: {e}")  # For debugging
+            # Queue confirmation email; the send_queued_mail worker delivers it
+            await outbox.aenqueue(
+                f'Booking Request - {booking.room.title}',
+                f'Hello {booking.name},\n\n'
+                f'Thank you for your booking request at UBWIZA Apartment!\n\n'
+                f'Booking Details:\n'
+                f'Room: {booking.room.title}\n'
+                f'Check-in: {booking.check_in}\n'
+                f'Check-out: {booking.check_out}\n'
+                f'Guests: {booking.guests}\n'
+                f'Estimated Cost: {total_cost} RWF\n\n'
+                f'We will review your request and contact you within 24 hours to confirm your booking.\n\n'
+                f'Best regards,\n'
+                f'UBWIZA Apartment Team\n'
+                f'Phone: +250 791 010 558\n'
+                f'Email: tuyambazesylvain5@gmail.com',
+                [booking.email],
+            )
             
             messages.success(request, 
                 f'Booking request submitted successfully! '
@@ -162,8 +213,9 @@ def booking(request):
         'today': timezone.now().date().isoformat(),
         'tomorrow': (timezone.now() + timedelta(days=1)).date().isoformat(),
     }
-    return render(request, 'main/booking.html', context)
+    return await sync_to_async(render)(request, 'main/booking.html', context)
 
+@cache_public_page('room')
 def room_detail(request, room_id):
     """Detailed view for individual room"""
     room = get_object_or_404(Room, id=room_id)
@@ -175,27 +227,61 @@ def room_detail(request, room_id):
     }
     return render(request, 'main/room_detail.html', context)
 
-def check_availability(request):
-    """AJAX view to check room availability"""
+@cache_public_page('room', 'apartment')
+def site_search(request):
+    """JSON search over rooms and apartments, best matches first"""
+    query = request.GET.get('q', '').strip()[:SEARCH_QUERY_MAX_LENGTH]
+    hits = search.search(query, kinds=['room', 'apartment'], limit=SEARCH_RESULTS_LIMIT)
+    found = {
+        'room': Room.objects.in_bulk([pk for kind, pk, _ in hits if kind == 'room']),
+        'apartment': Apartment.objects.in_bulk([pk for kind, pk, _ in hits if kind == 'apartment']),
+    }
+    results = []
+    for kind, pk, score in hits:
+        obj = found[kind].get(pk)
+        if obj is None:
+            continue
+        if kind == 'room':
+            title, url = obj.title, reverse('room_detail', args=[pk])
+        else:
+            title, url = obj.name, reverse('home') + '#apartments'
+        results.append({
+            'type': kind,
+            'id': pk,
+            'title': title,
+            'snippet': obj.description[:SEARCH_SNIPPET_LENGTH],
+            'url': url,
+            'score': round(score, 4),
+        })
+    return JsonResponse({'query': query, 'results': results})
+
+async def check_availability(request):
+    """AJAX view to check room availability
+
+    With ``room_id`` the answer is for that room; without it the ids of all
+    rooms free for the whole stay are returned. Async, so waiting on the
+    database does not hold a worker.
+    """
     if request.method == 'GET' and request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         check_in_str = request.GET.get('check_in')
         check_out_str = request.GET.get('check_out')
         room_id = request.GET.get('room_id')
         
         try:
-            if check_in_str and check_out_str and room_id:
+            if check_in_str and check_out_str:
                 check_in = datetime.strptime(check_in_str, '%Y-%m-%d').date()
                 check_out = datetime.strptime(check_out_str, '%Y-%m-%d').date()
                 
-                # Check for conflicting bookings
-                conflicting_bookings = Booking.objects.filter(
-                    room_id=room_id,
-                    check_in__lt=check_out,
-                    check_out__gt=check_in,
-                    confirmed=True
-                )
+                if not room_id:
+                    return JsonResponse({
+                        'available_rooms': await sync_to_async(availability.available_rooms)(check_in, check_out),
+                    })
                 
-                available = not conflicting_bookings.exists()
+                room_id = int(room_id)
+                if not await Room.objects.filter(pk=room_id).aexists():
+                    return JsonResponse({'error': 'Unknown room'}, status=404)
+                # Check for conflicting confirmed bookings
+                available = await sync_to_async(availability.is_available)(room_id, check_in, check_out)
                 return JsonResponse({
                     'available': available,
                     'message': 'Room is available for these dates.' if available else 'Room is not available for the selected dates.'
@@ -205,15 +291,46 @@ def check_availability(request):
     
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
+def availability_calendar(request):
+    """JSON occupancy bitmaps for every room over a window of nights
+
+    Query parameters: ``start`` (YYYY-MM-DD, defaults to today) and ``days``
+    (defaults to 90, at most 366).
+    """
+    try:
+        start_str = request.GET.get('start')
+        start = datetime.strptime(start_str, '%Y-%m-%d').date() if start_str else timezone.now().date()
+        days = int(request.GET.get('days', CALENDAR_DEFAULT_DAYS))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid start date or number of days'}, status=400)
+    if not 1 <= days <= CALENDAR_MAX_DAYS:
+        return JsonResponse({'error': f'days must be between 1 and {CALENDAR_MAX_DAYS}'}, status=400)
+    if start > date.max - timedelta(days=days):
+        return JsonResponse({'error': 'The window ends after the last representable date'}, status=400)
+    
+    bitmaps = availability.occupancy_calendar(start, days)
+    return JsonResponse({
+        'start': start.isoformat(),
+        'days': days,
+        'rooms': {str(room_id): bits for room_id, bits in bitmaps.items()},
+    })
+
 def booking_success(request, booking_id):
     """Success page after booking"""
-    booking = get_object_or_404(Booking, id=booking_id)
+    booking = get_object_or_404(Booking.objects.with_room(), id=booking_id)
     context = {'booking': booking}
     return render(request, 'main/booking_success.html', context)
 
 # Dashboard and reporting views (for admin or internal use)
+def _report_months(today, count=REPORT_MONTHS):
+    """First day of the month ``count - 1`` months ago and last day of this month"""
+    year, month = divmod(today.year * 12 + today.month - 1 - (count - 1), 12)
+    start = today.replace(year=year, month=month + 1, day=1)
+    end = today.replace(day=calendar.monthrange(today.year, today.month)[1])
+    return start, end
+
 def booking_report(request):
-    """Simple booking report - you can enhance this later"""
+    """Booking report built from the daily rollups in main.reports"""
     if not request.user.is_staff:
         return redirect('home')
     
@@ -221,13 +338,67 @@ def booking_report(request):
     last_week = today - timedelta(days=7)
     last_month = today - timedelta(days=30)
     
-    recent_bookings = Booking.objects.filter(created_at__date__gte=last_week)
-    monthly_bookings = Booking.objects.filter(created_at__date__gte=last_month)
+    recent_bookings = Booking.objects.with_room().filter(created_at__date__gte=last_week)
+    monthly_bookings = Booking.objects.with_room().filter(created_at__date__gte=last_month)
+    stats = site_stats()
     
     context = {
         'recent_bookings': recent_bookings,
         'monthly_bookings': monthly_bookings,
-        'total_bookings': Booking.objects.count(),
-        'confirmed_bookings': Booking.objects.filter(confirmed=True).count(),
+        'booking_lists': [('Last 7 days', recent_bookings), ('Last 30 days', monthly_bookings)],
+        'total_bookings': stats['total_bookings'],
+        'confirmed_bookings': stats['confirmed_bookings'],
+        'week_totals': reports.totals(last_week),
+        'month_totals': reports.totals(last_month),
+        'months': reports.monthly(*_report_months(today)),
     }
-    return render(request, 'main/booking_report.html', context)
\ No newline at end of file
+    return render(request, 'main/booking_report.html', context)
+
+def booking_report_data(request):
+    """JSON monthly occupancy and revenue series for report charts"""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Staff only'}, status=403)
+    try:
+        months = min(int(request.GET.get('months', REPORT_MONTHS)), 120)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid number of months'}, status=400)
+    return JsonResponse({'months': reports.monthly(*_report_months(timezone.now().date(), max(1, months)))})
+
+def booking_analytics(request):
+    """Staff JSON: per-room occupancy, stay length, lead time and projected revenue
+
+    Occupancy is measured over ``start``..``end`` (YYYY-MM-DD, defaulting to
+    the last 90 days); projected revenue covers confirmed stays from today on.
+    Counts, stay length and lead time cover the stays overlapping the window
+    or still to come.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Staff only'}, status=403)
+    today = timezone.now().date()
+    try:
+        start = datetime.strptime(request.GET['start'], '%Y-%m-%d').date() if 'start' in request.GET else today - timedelta(days=90)
+        end = datetime.strptime(request.GET['end'], '%Y-%m-%d').date() if 'end' in request.GET else today
+    except ValueError:
+        return JsonResponse({'error': 'Invalid date format'}, status=400)
+    if end <= start:
+        return JsonResponse({'error': 'end must be after start'}, status=400)
+    
+    return JsonResponse({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'rooms': analytics.summarize(start, end, today),
+    })
+
+def request_metrics(request):
+    """Staff-only per-view request metrics in Prometheus text format"""
+    if not request.user.is_staff:
+        return HttpResponse('Staff only', status=403, content_type='text/plain')
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def export_data(request, dataset, fmt):
+    """Staff download of all bookings or contact messages as CSV or JSON Lines"""
+    if not request.user.is_staff:
+        return redirect('home')
+    if dataset not in exports.DATASETS or fmt not in exports.FORMATS:
+        raise Http404('Unknown export')
+    return exports.export_response(request, dataset, fmt)